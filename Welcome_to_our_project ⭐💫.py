@@ -1,8 +1,10 @@
 import streamlit as st
-import base64
+from sleep_health.assets import background_layers
+from sleep_health.tracing import begin, finish_with_panel
 
 # PAGE CONFIG
 st.set_page_config(page_title="🌙 Welcome – Understand Your Sleep", layout="wide", initial_sidebar_state="collapsed")
+begin("Welcome")
 
 # Import Google Fonts
 st.markdown("""
@@ -12,8 +14,8 @@ st.markdown("""
 # BACKGROUND
 
 def set_background_with_overlay(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
+    # Resized variants served from app/static instead of an inline base64 copy.
+    fallback, preferred = background_layers(image_file)
     css = f"""
     <style>
     [data-testid="stAppViewContainer"] {{
@@ -21,7 +23,12 @@ def set_background_with_overlay(image_file):
             rgba(255, 246, 240, 0.85),
             rgba(255, 246, 240, 0.85)
         ),
-        url("data:image/jpg;base64,{encoded}");
+        {fallback};
+        background-image: linear-gradient(
+            rgba(255, 246, 240, 0.85),
+            rgba(255, 246, 240, 0.85)
+        ),
+        {preferred};
         background-size: cover;
         background-position: center;
         background-attachment: fixed;
@@ -197,3 +204,4 @@ def main():
         show_main_app()
 
 main()
+finish_with_panel()
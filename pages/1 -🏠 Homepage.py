@@ -1,28 +1,20 @@
 import streamlit as st
-from streamlit_extras.colored_header import colored_header
-from streamlit_extras.let_it_rain import rain
-from streamlit_lottie import st_lottie
-import base64
 import time
-import json
 from streamlit.components.v1 import html
+from sleep_health.animations import load_lottie
+from sleep_health.assets import audio_html, picture_html
+from sleep_health.startup import load
+from sleep_health.tracing import begin, finish_with_panel
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Sleep Health & Lifestyle", page_icon="🛌", layout="wide")
+begin("Homepage")
 
 # --- MUSIC BACKGROUND ---
-def get_audio_base64(file_path):
-    with open(file_path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
-audio_base64 = get_audio_base64("lofi.mp3")  
-audio_html = f"""
-<audio autoplay loop>
-    <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
-</audio>
-"""
-st.markdown(audio_html, unsafe_allow_html=True)
+# Streamed from app/static; skipped when lofi.mp3 is not deployed.
+background_music = audio_html("lofi.mp3")
+if background_music:
+    st.markdown(background_music, unsafe_allow_html=True)
 
 # --------- Font Styling ---------
 st.markdown("""
@@ -76,12 +68,8 @@ st.markdown(
    """,
    unsafe_allow_html=True)
 
-# --- LOTTIE LOADER ---
-def load_lottie_file(filepath: str):
-    with open(filepath, "r") as f:
-        return json.load(f)
-
 # --- RAIN EFFECT ---
+rain = load("streamlit_extras.let_it_rain").rain
 rain(emoji="💤", font_size=44, falling_speed=5, animation_length="2")
 
 # --- INTRO WITH TYPING ---
@@ -95,7 +83,8 @@ with st.empty():
         time.sleep(1.5)
 
 # --- HEADER ANIMATION ---
-lottie_animation = load_lottie_file("sleepy.json")
+lottie_animation = load_lottie("sleepy.json")
+st_lottie = load("streamlit_lottie").st_lottie
 st_lottie(lottie_animation, height=300, key="header_lottie")
 
 # --- TEAM SECTION ---
@@ -163,15 +152,13 @@ team_html = """
 
 for member in team:
     try:
-        with open(member["image"], "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode()
-        img_src = f"data:image/jpeg;base64,{img_base64}"
-    except:
-        img_src = "https://via.placeholder.com/220x220.png?text=No+Image"
+        img_tag = picture_html(member["image"], member["name"])
+    except OSError:
+        img_tag = f'<img src="https://via.placeholder.com/220x220.png?text=No+Image" alt="{member["name"]}">'
 
     team_html += f"""
     <div class='team-card'>
-        <img src="{img_src}" alt="{member['name']}">
+        {img_tag}
         <h4>{member['name']}</h4>
         <p>{member['id']}</p>
     </div>
@@ -185,7 +172,7 @@ st.markdown("<div id='contact'></div>", unsafe_allow_html=True)
 st.subheader("📬 Contact Us")
 st.caption("Got a question or feedback? We’d love to hear from you!")
 
-contact_animation = load_lottie_file("contact.json")
+contact_animation = load_lottie("contact.json")
 st_lottie(contact_animation, height=200, key="contact_anim")
 
 st.markdown("""
@@ -202,4 +189,4 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-
+finish_with_panel()
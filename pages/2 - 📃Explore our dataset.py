@@ -1,10 +1,15 @@
 import streamlit as st
-import pandas as pd
-from streamlit_lottie import st_lottie
-import json
+from sleep_health.animations import load_lottie
+from sleep_health.filters import FilterSpec
+from sleep_health.preview import paginated_preview
+from sleep_health.startup import load
+from sleep_health.store import load_data, select_rows
+from sleep_health.tracing import begin, finish_with_panel, span
+from sleep_health.views import FrameView
 
 # ====== PAGE CONFIG ======
 st.set_page_config(page_title="Sleep Dataset Explorer", layout="wide", page_icon="")
+begin("Sleep Dataset Explorer")
 
 # ====== CUSTOM CSS ======
 st.markdown("""
@@ -128,13 +133,10 @@ hr.custom-hr {
 st.markdown('<h1 class="main-heading">Sleep Dataset Explorer</h1>', unsafe_allow_html=True)
 
 # ====== Load Lottie Animation ======
-def load_lottie_file(filepath: str):
-    with open(filepath, "r") as f:
-        return json.load(f)
-
-lottie_sleep = load_lottie_file("panda_sleep.json")
+lottie_sleep = load_lottie("panda_sleep.json")
 
 if lottie_sleep:
+    st_lottie = load("streamlit_lottie").st_lottie
     st_lottie(lottie_sleep, speed=1, loop=True, quality="high", height=300, key="sleep_animation")
 else:
     st.error("Failed to load animation")
@@ -148,11 +150,16 @@ st.markdown("""
     <div class="sub-sub-heading fade-in">Dive deep into the insights behind sleep and lifestyle.</div>
 """, unsafe_allow_html=True)
 
+# ====== LOAD DATA ======
+df = load_data()
+display_columns = {name: name.strip().replace(" ", "_") for name in df.columns}
+
 # ====== METRICS ======
+# Counted from the compact snapshot (Blood Pressure is stored as two columns).
 cols = st.columns(2)
 metrics = [
-    ("https://img.icons8.com/?size=96&id=HFPX8dOrlqo7&format=png", "532 records"),
-    ("https://img.icons8.com/?size=96&id=80305&format=png", "15 columns"),
+    ("https://img.icons8.com/?size=96&id=HFPX8dOrlqo7&format=png", f"{len(df):,} records"),
+    ("https://img.icons8.com/?size=96&id=80305&format=png", f"{len(df.columns)} columns"),
 ]
 
 for col, (icon, text) in zip(cols, metrics):
@@ -187,15 +194,6 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# ====== LOAD DATA ======
-@st.cache_data
-def load_data():
-    df = pd.read_excel("Sleep Health Lifestyle Dataset.xlsx")
-    df.columns = df.columns.str.strip().str.replace(" ", "_")
-    return df
-
-df = load_data()
-
 # ====== SIDEBAR FILTERS ======
 with st.sidebar:
     st.markdown("<h3 style='font-family: Merriweather, serif; color:#004a99;'>Filter Dataset</h3>", unsafe_allow_html=True)
@@ -205,28 +203,28 @@ with st.sidebar:
     default_age_range = (min(age_options), max(age_options))
 
     if st.button("Reset Filters"):
-        st.session_state["selected_nationalities"] = []
-        st.session_state["selected_genders"] = []
-        st.session_state["selected_age_range"] = default_age_range
+        st.session_state["explore_nationalities"] = []
+        st.session_state["explore_genders"] = []
+        st.session_state["explore_age_range"] = default_age_range
 
     selected_nationalities = st.multiselect(
         "Select Nationality", options=nationality_options,
-        default=st.session_state.get("selected_nationalities", []),
-        key="selected_nationalities"
+        default=st.session_state.get("explore_nationalities", []),
+        key="explore_nationalities"
     )
 
     selected_genders = st.multiselect(
         "Select Gender", options=gender_options,
-        default=st.session_state.get("selected_genders", []),
-        key="selected_genders"
+        default=st.session_state.get("explore_genders", []),
+        key="explore_genders"
     )
 
     selected_age_range = st.slider(
         "Select Age Range",
         min_value=default_age_range[0],
         max_value=default_age_range[1],
-        value=st.session_state.get("selected_age_range", default_age_range),
-        key="selected_age_range"
+        value=st.session_state.get("explore_age_range", default_age_range),
+        key="explore_age_range"
     )
 
 # ====== VARIABLE DESCRIPTION ======
@@ -248,7 +246,8 @@ variables_description = [
     ("Physical_Activity_Level", "An indicator of activity level."),
     ("Stress_Level", "Measure of perceived stress, rated on a scale."),
     ("BMI_Category", "Body mass index category."),
-    ("Blood_Pressure", "Blood pressure in systolic/diastolic format."),
+    ("Systolic_BP", "Systolic blood pressure (upper reading) in mmHg."),
+    ("Diastolic_BP", "Diastolic blood pressure (lower reading) in mmHg."),
     ("Heart_Rate", "Resting heart rate measured in bpm."),
     ("Daily_Steps", "Average number of steps taken per day."),
     ("Sleep_Disorder", "Whether the individual has a sleep disorder or none."),
@@ -262,13 +261,9 @@ for idx, (name, desc) in enumerate(variables_description, 1):
     """, unsafe_allow_html=True)
 
 # ====== FILTER DATA ======
-filtered_df = df.copy()
-if selected_nationalities:
-    filtered_df = filtered_df[filtered_df["Nationality"].isin(selected_nationalities)]
-if selected_genders:
-    filtered_df = filtered_df[filtered_df["Gender"].isin(selected_genders)]
-if selected_age_range:
-    filtered_df = filtered_df[(filtered_df["Age"] >= selected_age_range[0]) & (filtered_df["Age"] <= selected_age_range[1])]
+filter_spec = FilterSpec.build({"Nationality": selected_nationalities, "Gender": selected_genders}, selected_age_range)
+with span("apply_filters"):
+    filtered_view = FrameView(df, select_rows(filter_spec))
 
 # ====== DISPLAY DATA ======
 st.markdown("""
@@ -281,9 +276,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 st.markdown(
-    f"""<div class='fade-in'>Showing <span style='color:blue; font-weight:bold;'>{len(filtered_df):,}</span> 
+    f"""<div class='fade-in'>Showing <span style='color:blue; font-weight:bold;'>{len(filtered_view):,}</span> 
     of <span style='color:red; font-weight:bold;'>{len(df):,}</span> records</div>""",
     unsafe_allow_html=True
 )
 
-st.dataframe(filtered_df.reset_index(drop=True), use_container_width=True)
+with span("emit_dataframe"):
+    paginated_preview(filtered_view, "explore_preview", labels=display_columns)
+
+finish_with_panel()
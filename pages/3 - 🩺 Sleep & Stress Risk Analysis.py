@@ -1,9 +1,15 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import joypy
-import time
+from concurrent.futures import as_completed
+from sleep_health.charts import CHART_POOL, cached_pie_chart, cached_ridgeline, figure_key
+from sleep_health.filters import FilterSpec
+from sleep_health.insights import DISORDER_ORDER, colored_stress, disorder_badge, stress_insight_html, stress_profile
+from sleep_health.preview import paginated_preview
+from sleep_health.snapshot import dataset_version
+from sleep_health.store import load_cube, load_data, select_rows
+from sleep_health.tracing import begin, finish_with_panel, span, submit, traced
+from sleep_health.views import FrameView
+
+begin("Sleep & Stress Risk Analysis")
 
 # -------------------- PAGE CONFIG --------------------
 st.markdown("""
@@ -55,171 +61,71 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# -------------------- CONSTANTS --------------------
-DISORDER_ORDER = ['Sleep Apnea', 'Insomnia', 'None']
-COLOR_MAP = {'Sleep Apnea': '#E6A1B3', 'Insomnia': '#E66A6A', 'None': '#D8BFD8'}
-RIDGE_COLOR_MAP = {'Sleep Apnea': '#A7C7E7', 'Insomnia': '#FFD1A9', 'None': '#E66A6A'}
-
-# -------------------- DATA LOADING --------------------
-@st.cache_data
-def load_data():
-    df = pd.read_excel("Sleep Health Lifestyle Dataset.xlsx")
-    df['Sleep Disorder'] = df['Sleep Disorder'].fillna('None')
-    return df
-
 # -------------------- FILTER FUNCTION --------------------
-def apply_filters(data, genders, disorders, age_range):
-    df = data.copy()
-    if genders:
-        df = df[df['Gender'].isin(genders)]
-    if disorders:
-        df = df[df['Sleep Disorder'].isin(disorders)]
-    df = df[df['Age'].between(age_range[0], age_range[1])]
-    return df
-
-# -------------------- PIE CHART FUNCTION --------------------
-def plot_pie_chart(data):
-    counts = data['Sleep Disorder'].value_counts().reindex(DISORDER_ORDER).fillna(0)
-    filtered_counts = counts[counts > 0]
-    if filtered_counts.empty:
-        st.warning("No data for the selected filters.")
-        return counts
-    if len(filtered_counts) == 1:
-        st.info(f"Only one disorder selected: **{filtered_counts.index[0]}** (100%).")
-    fig, ax = plt.subplots(figsize=(6, 6))
-    wedges, _, _ = ax.pie(
-        filtered_counts,
-        colors=[COLOR_MAP[k] for k in filtered_counts.index],
-        autopct='%1.1f%%',
-        startangle=140,
-        textprops={'fontsize': 13},
-        wedgeprops={'edgecolor': 'white', 'linewidth': 1.5},
-        pctdistance=0.8
-    )
-    for i, wedge in enumerate(wedges):
-        ang = (wedge.theta2 + wedge.theta1) / 2
-        x, y = np.cos(np.deg2rad(ang)), np.sin(np.deg2rad(ang))
-        ha = "right" if x < 0 else "left"
-        ax.annotate(
-            filtered_counts.index[i],
-            xy=(x, y),
-            xytext=(1.1 * np.sign(x), 1.05 * y),
-            ha=ha, va="center",
-            fontsize=14,
-            bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", lw=0.5),
-            arrowprops=dict(arrowstyle="-", color="gray")
-        )
-    ax.axis('equal')
-    st.pyplot(fig)
-    plt.close(fig)
-    return counts
+@traced()
+def apply_filters(data, spec):
+    return FrameView(data, select_rows(spec))
 
-# -------------------- RIDGELINE PLOT FUNCTION --------------------
-def plot_ridgeline(data):
-    valid_counts = data['Sleep Disorder'].value_counts()
-    valid_disorders = valid_counts[valid_counts > 1].index.tolist()
-    ridge_df = data[data['Sleep Disorder'].isin(valid_disorders)].dropna(subset=['Stress Level'])
-    if not valid_disorders or ridge_df.empty:
-        st.info("Not enough data to show ridgeline plot.")
-        return ridge_df
-    fig, _ = joypy.joyplot(
-        ridge_df,
-        by='Sleep Disorder',
-        column='Stress Level',
-        color=[RIDGE_COLOR_MAP[d] for d in valid_disorders],
-        alpha=0.7,
-        figsize=(8, 6),
-        fade=True
-    )
-    plt.xlabel('Stress Level', fontsize=14)
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)
-    return ridge_df
+@traced()
+def disorder_summary(spec):
+    stats = load_cube().rollup(['Sleep Disorder'], **spec.query())
+    return stats.set_index('Sleep Disorder')
 
 # -------------------- INTERPRETATION GENERATOR --------------------
-def generate_dynamic_analysis(counts, ridge_df):
+@traced()
+def generate_dynamic_analysis(stats):
+    counts = stats['count'].reindex(DISORDER_ORDER).fillna(0)
+    valid_stats = stats[stats['count'] > 1]
     total = counts.sum()
     dominant = counts.idxmax() if total > 0 else None
-    BADGE_COLOR = COLOR_MAP
-    def badge(text, color="#FFD700"):
-        return f'<span style="background-color:{color}; color:black; padding:3px 8px; border-radius:8px; font-size:13px;">{text}</span>'
-    def colored_number(value):
-        try:
-            val = float(value)
-            if val < 5:
-                color = "#668fd4"
-            elif val < 7:
-                color = "#fa9850"
-            else:
-                color = "#e4444e"
-            return f'<span style="color:{color}; font-weight:bold;">{val:.2f}</span>'
-        except:
-            return f'<span style="color:gray;">N/A</span>'
     if total == 0:
         pie_summary = "No data available for current filter selection."
     else:
         pie_summary = (
             f"The most common sleep condition in the selected group is "
-            f"{badge(dominant, BADGE_COLOR.get(dominant, '#ccc'))}, based on the filtered data."
+            f"{disorder_badge(dominant)}, based on the filtered data."
         )
-    if ridge_df.empty:
+    if valid_stats.empty:
         ridge_summary = "Stress level distribution is not available for the current filters."
     else:
-        avg_stress = ridge_df.groupby('Sleep Disorder')['Stress Level'].mean().sort_values(ascending=False)
+        avg_stress = valid_stats['Stress Level_mean'].sort_values(ascending=False)
         highest = avg_stress.index[0]
         highest_val = avg_stress.iloc[0]
         ridge_summary = (
-            f"People with {badge(highest, BADGE_COLOR.get(highest, '#ccc'))} show the highest average stress level: "
-            f"{colored_number(highest_val)}."
+            f"People with {disorder_badge(highest)} show the highest average stress level: "
+            f"{colored_stress(highest_val)}."
         )
     return pie_summary, ridge_summary
 
 # -------------------- DEMOGRAPHIC INSIGHT GENERATOR --------------------
-def generate_demographic_insight(filtered_df):
-    insights = ""
-    BADGE_COLOR = COLOR_MAP
-    def badge(text, color="#FFD700"):
-        return f'<span style="background-color:{color}; color:black; padding:3px 8px; border-radius:8px; font-size:13px;">{text}</span>'
-    def colored_number(value):
-        try:
-            val = float(value)
-            if val < 5:
-                color = "#668fd4"
-            elif val < 7:
-                color = "#fa9850"
-            else:
-                color = "#e4444e"
-            return f'<span style="color:{color}; font-weight:bold;">{val:.2f}</span>'
-        except:
-            return f'<span style="color:gray;">N/A</span>'
-    if 'Gender' in filtered_df.columns and not filtered_df.empty:
-        gender_groups = filtered_df.groupby('Gender', observed=False)
-        insights += "<strong>🔸Gender-Based Observations</strong><br><br>"
-        for gender, group in gender_groups:
-            disorder_ratio = group['Sleep Disorder'].value_counts(normalize=True) * 100
-            dominant_disorder = disorder_ratio.idxmax()
-            stress_mean = group['Stress Level'].mean() if 'Stress Level' in group.columns else None
-            insights += f"- Among <strong>{gender}</strong>, the most common sleep condition is {badge(dominant_disorder, BADGE_COLOR.get(dominant_disorder, '#ccc'))}.<br>"
-            if stress_mean:
-                insights += f"&nbsp;&nbsp;&nbsp;&nbsp;Average stress level: {colored_number(stress_mean)}<br>"
-    if 'Age' in filtered_df.columns:
-        age_bins = [0, 25, 40, 60, 100]
-        age_labels = ["<25", "25-40", "40-60", "60+"]
-        filtered_df = filtered_df.copy()
-        filtered_df['Age Group'] = pd.cut(filtered_df['Age'], bins=age_bins, labels=age_labels)
-        insights += "<br><strong>🔸Age Group Insights</strong><br><br>"
-        age_groups = filtered_df.groupby('Age Group', observed=False)
-        for label, group in age_groups:
-            if group.empty:
-                continue
-            disorder_counts = group['Sleep Disorder'].value_counts(normalize=True) * 100
-            top_disorder = disorder_counts.idxmax()
-            avg_stress = group['Stress Level'].mean() if 'Stress Level' in group.columns else None
-            insights += f"- In the <strong>{label}</strong> age group, {badge(top_disorder, BADGE_COLOR.get(top_disorder, '#ccc'))} is most common.<br>"
-            if avg_stress:
-                insights += f"&nbsp;&nbsp;&nbsp;&nbsp;Average stress level: {colored_number(avg_stress)}<br>"
-    return insights
+@traced()
+def generate_demographic_insight(cube, spec):
+    by_gender, by_age = stress_profile(cube, **spec.query())
+    return stress_insight_html(by_gender, by_age)
+
+# -------------------- SUMMARY BOXES --------------------
+def general_insights_box(pie_en, ridge_en):
+    return f"""
+        <div class="insight-box" style="padding:20px; background-color:#f9f9f9; border-left: 5px solid #6C63FF; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
+            <h3 style="margin-top:0; color:#333;">📊General Insights</h3>
+            <p style="font-size:16px;">{pie_en}</p>
+            <p style="font-size:16px;">{ridge_en}</p>
+            <hr style="margin:15px 0;">
+            <p style="font-size:14px;"><strong>Stress Level Legend:</strong><br>
+                <span style="color:#668fd4; font-weight:bold;">Low &lt; 5</span> |
+                <span style="color:#fa9850; font-weight:bold;">Moderate 5 - 6.99</span> |
+                <span style="color:#e4444e; font-weight:bold;">High ≥ 7</span>
+            </p>
+        </div>
+        """
+
+def demographic_box(demographic_en):
+    return f"""
+        <div class="insight-box" style="padding:20px; background-color:white; border-left: 5px solid #20B2AA; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
+            <h3 style="margin-top:0; color:#333;">👥Demographic Patterns</h3>
+            <p style="font-size:16px;">{demographic_en}</p>
+        </div>
+        """
 
 # -------------------- MAIN APP --------------------
 df = load_data()
@@ -234,51 +140,51 @@ default_disorders = DISORDER_ORDER
 min_age, max_age = int(df['Age'].min()), int(df['Age'].max())
 default_age_range = (min_age, max_age)
 
-if "selected_genders" not in st.session_state:
-    st.session_state.selected_genders = [] 
-if "selected_disorders" not in st.session_state:
-    st.session_state.selected_disorders = [] 
-if "age_range" not in st.session_state:
-    st.session_state.age_range = default_age_range
+if "risk_genders" not in st.session_state:
+    st.session_state.risk_genders = [] 
+if "risk_disorders" not in st.session_state:
+    st.session_state.risk_disorders = [] 
+if "risk_age_range" not in st.session_state:
+    st.session_state.risk_age_range = default_age_range
 
 # Reset button
 if st.sidebar.button("🔄 Reset Filters"):
-    st.session_state.selected_genders = []
-    st.session_state.selected_disorders = []
-    st.session_state.age_range = default_age_range
+    st.session_state.risk_genders = []
+    st.session_state.risk_disorders = []
+    st.session_state.risk_age_range = default_age_range
     st.rerun()
 
 st.sidebar.multiselect(
     "Select gender(s):",
     options=default_genders,
-    default=st.session_state.selected_genders,
-    key="selected_genders"
+    default=st.session_state.risk_genders,
+    key="risk_genders"
 )
 
 st.sidebar.multiselect(
     "Select disorder types:",
     options=DISORDER_ORDER,
-    default=st.session_state.selected_disorders,
-    key="selected_disorders"
+    default=st.session_state.risk_disorders,
+    key="risk_disorders"
 )
 
 st.sidebar.slider(
     "Select age range:",
     min_value=min_age,
     max_value=max_age,
-    value=st.session_state.age_range,
-    key="age_range"
+    value=st.session_state.risk_age_range,
+    key="risk_age_range"
 )
 
 # Áp dụng filter theo session_state
+filter_spec = FilterSpec.build(
+    {'Gender': st.session_state.risk_genders, 'Sleep Disorder': st.session_state.risk_disorders},
+    st.session_state.risk_age_range,
+)
 with st.spinner("Processing filters..."):
-    time.sleep(0.5)
-    filtered_df = df.copy()
-    if st.session_state.selected_genders:
-        filtered_df = filtered_df[filtered_df['Gender'].isin(st.session_state.selected_genders)]
-    if st.session_state.selected_disorders:
-        filtered_df = filtered_df[filtered_df['Sleep Disorder'].isin(st.session_state.selected_disorders)]
-    filtered_df = filtered_df[filtered_df['Age'].between(st.session_state.age_range[0], st.session_state.age_range[1])]
+    filtered_view = apply_filters(df, filter_spec)
+    disorder_stats = disorder_summary(filter_spec)
+    cube = load_cube()
 
 # -------------------- MAIN CONTENT --------------------
 st.markdown('''
@@ -296,63 +202,80 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+disorder_counts = disorder_stats['count'].reindex(DISORDER_ORDER).fillna(0)
+pie_counts = disorder_counts[disorder_counts > 0]
+
 col1, col2 = st.columns(2)
 with col1:
-    with st.spinner("Loading sleep disorder chart..."):
-        time.sleep(0.8)
-        st.markdown('<div class="fade-in-section">', unsafe_allow_html=True)
-        st.subheader("Sleep Disorder Proportion")
-        disorder_counts = plot_pie_chart(filtered_df)
-        st.markdown('</div>', unsafe_allow_html=True)
+    st.markdown('<div class="fade-in-section">', unsafe_allow_html=True)
+    st.subheader("Sleep Disorder Proportion")
+    if pie_counts.empty:
+        st.warning("No data for the selected filters.")
+    elif len(pie_counts) == 1:
+        st.info(f"Only one disorder selected: **{pie_counts.index[0]}** (100%).")
+    pie_slot = st.empty()
+    st.markdown('</div>', unsafe_allow_html=True)
 
 with col2:
-    with st.spinner("Generating stress level plot..."):
-        time.sleep(0.8)
-        st.markdown('<div class="fade-in-section">', unsafe_allow_html=True)
-        st.subheader("Stress Level Distribution by Disorder")
-        ridge_data = plot_ridgeline(filtered_df)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-# -------------------- INTERPRETATION --------------------
-pie_en, ridge_en = generate_dynamic_analysis(disorder_counts, ridge_data)
-demographic_en = generate_demographic_insight(filtered_df)
+    st.markdown('<div class="fade-in-section">', unsafe_allow_html=True)
+    st.subheader("Stress Level Distribution by Disorder")
+    ridge_slot = st.empty()
+    st.markdown('</div>', unsafe_allow_html=True)
 
 st.markdown("---")
 st.markdown('<div class="fade-in-section">', unsafe_allow_html=True)
 st.subheader("Analytical Summary")
 st.markdown("This analytical summary is displayed based on the chosen filter criteria")
 col_a, col_b = st.columns(2)
-
 with col_a:
-    st.markdown(
-        f"""
-        <div class="insight-box" style="padding:20px; background-color:#f9f9f9; border-left: 5px solid #6C63FF; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
-            <h3 style="margin-top:0; color:#333;">📊General Insights</h3>
-            <p style="font-size:16px;">{pie_en}</p>
-            <p style="font-size:16px;">{ridge_en}</p>
-            <hr style="margin:15px 0;">
-            <p style="font-size:14px;"><strong>Stress Level Legend:</strong><br>
-                <span style="color:#668fd4; font-weight:bold;">Low &lt; 5</span> |
-                <span style="color:#fa9850; font-weight:bold;">Moderate 5 - 6.99</span> |
-                <span style="color:#e4444e; font-weight:bold;">High ≥ 7</span>
-            </p>
-        </div>
-        """, unsafe_allow_html=True
-    )
-
+    general_slot = st.empty()
 with col_b:
-    st.markdown(
-        f"""
-        <div class="insight-box" style="padding:20px; background-color:white; border-left: 5px solid #20B2AA; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
-            <h3 style="margin-top:0; color:#333;">👥Demographic Patterns</h3>
-            <p style="font-size:16px;">{demographic_en}</p>
-        </div>
-        """, unsafe_allow_html=True
-    )
+    demographic_slot = st.empty()
 st.markdown('</div>', unsafe_allow_html=True)
 
+# -------------------- CONCURRENT RENDERING --------------------
+# The layout above is already on screen; each slot is filled as soon as its task finishes.
+# Charts for a filter state that was already drawn come straight from the figure cache.
+chart_key = figure_key(filter_spec, dataset_version())
+if not pie_counts.empty:
+    pie_slot.caption("⏳ Loading sleep disorder chart...")
+ridge_slot.caption("⏳ Generating stress level plot...")
+general_slot.caption("⏳ Summarizing filtered data...")
+demographic_slot.caption("⏳ Comparing demographic groups...")
+
+def show_ridgeline(png):
+    if png is None:
+        ridge_slot.info("Not enough data to show ridgeline plot.")
+    else:
+        ridge_slot.image(png, use_container_width=True)
+
+# Each task is (stage name, callback that draws its result); the name times the emission.
+tasks = {
+    submit(CHART_POOL, cached_ridgeline, chart_key, filtered_view): ("emit_ridgeline", show_ridgeline),
+    submit(CHART_POOL, generate_dynamic_analysis, disorder_stats): (
+        "emit_general_insights",
+        lambda summaries: general_slot.markdown(general_insights_box(*summaries), unsafe_allow_html=True),
+    ),
+    submit(CHART_POOL, generate_demographic_insight, cube, filter_spec): (
+        "emit_demographic_insights",
+        lambda insight: demographic_slot.markdown(demographic_box(insight), unsafe_allow_html=True),
+    ),
+}
+if not pie_counts.empty:
+    tasks[submit(CHART_POOL, cached_pie_chart, chart_key, pie_counts)] = (
+        "emit_pie_chart",
+        lambda png: pie_slot.image(png, use_container_width=True),
+    )
+for future in as_completed(tasks):
+    stage, show = tasks[future]
+    with span(stage):
+        show(future.result())
+
 # -------------------- RAW DATA --------------------
 with st.expander("View Filtered Raw Data"):
     st.caption("Filtered dataset preview:")
-    st.dataframe(filtered_df.reset_index(drop=True), use_container_width=True) 
+    with span("emit_dataframe"):
+        paginated_preview(filtered_view, "risk_raw_preview")
+
+finish_with_panel()
 
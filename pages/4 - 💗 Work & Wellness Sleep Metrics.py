@@ -1,9 +1,17 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from sleep_health.cube import FIRST_ROW
+from sleep_health.filters import FilterSpec
+from sleep_health.insights import badge, colored_heart_rate, heart_rate_insight_html, heart_rate_profile
+from sleep_health.plots import cached_figure, heart_rate_line, plot_key, sleep_quality_bar
+from sleep_health.preview import paginated_preview
+from sleep_health.snapshot import dataset_version
+from sleep_health.store import load_age_prefix, load_cube, load_data, select_rows
+from sleep_health.tracing import begin, finish_with_panel, fragment_run, span, traced
+from sleep_health.views import FrameView
 
 # --------- Page Configuration ---------
 st.set_page_config(page_title="Stress & Sleep Dashboard", layout="wide")
+begin("Work & Wellness Sleep Metrics")
 
 # --------- Font Styling ---------
 st.markdown("""
@@ -60,10 +68,8 @@ st.markdown("""
    </style>
 """, unsafe_allow_html=True)
 
-# --------- Load Dataset from XLSX ---------
-file_path = "Sleep Health Lifestyle Dataset.xlsx"
-df = pd.read_excel(file_path)
-df = df.dropna(subset=['Age', 'Gender', 'Heart Rate', 'Occupation', 'Sleep Duration', 'Quality of Sleep'])
+# --------- Load Dataset (shared columnar snapshot) ---------
+df = load_data()
 
 # --------- SIDEBAR: Age Filter ---------
 st.sidebar.header("Filter by Age")
@@ -105,22 +111,30 @@ filter_high_hr = st.sidebar.checkbox(
 )
 
 # --------- Filter dataset by Age and advanced filters ---------
-filtered_df = df[(df['Age'] >= selected_age[0]) & (df['Age'] <= selected_age[1])]
-
+# "complete" leaves out rows missing Age, Gender, Heart Rate, Occupation, Sleep
+# Duration or Quality of Sleep, for the KPIs, charts, summaries and preview alike.
+active_flags = ['complete']
 if filter_sleep_quality:
-   filtered_df = filtered_df[filtered_df['Quality of Sleep'] <= 6]
+   active_flags.append('poor_sleep')
 if filter_high_hr:
-   filtered_df = filtered_df[filtered_df['Heart Rate'] > 80]
+   active_flags.append('high_hr')
+filter_spec = FilterSpec.build(value_range=selected_age, flags=active_flags)
+with span("apply_filters"):
+   filtered_view = FrameView(df, select_rows(filter_spec))
+cube = load_cube()
+with span("kpi_rollups"):
+   kpi_totals = load_age_prefix().totals(**filter_spec.query())
+   occupation_counts = cube.rollup(['Occupation'], **filter_spec.query())
 
 # --------- KPI Metrics ---------
 st.markdown("#### 🧾 Key Performance Indicators")
 col1, col2, col3 = st.columns(3)
 with col1:
-   st.metric("👤 Records", len(filtered_df))
+   st.metric("👤 Records", int(kpi_totals['count']))
 with col2:
-   st.metric("❤️ Average Heart Rate", f"{filtered_df['Heart Rate'].mean():.1f} bpm")
+   st.metric("❤️ Average Heart Rate", f"{kpi_totals['Heart Rate_mean']:.1f} bpm")
 with col3:
-   st.metric("😴 Average Sleep Duration", f"{filtered_df['Sleep Duration'].mean():.1f} hours")
+   st.metric("😴 Average Sleep Duration", f"{kpi_totals['Sleep Duration_mean']:.1f} hours")
 
 # --------- Show Active Filters ---------
 active_filters = []
@@ -135,104 +149,56 @@ if active_filters:
    )
 
 # ---------- SECTION 1: Heart Rate Line Chart ----------
-heart_rate_grouped = filtered_df.groupby(['Age', 'Gender'], observed=False)['Heart Rate'].mean().reset_index()
-color_map = {'Female': '#E66A6A', 'Male': '#A7C7E7'}
-
-fig_line = px.line(
-   heart_rate_grouped,
-   x="Age",
-   y="Heart Rate",
-   color="Gender",
-   color_discrete_map=color_map,
-   markers=True,
-   title=(f" Average Heart Rate Trends by Gender (Ages {selected_age[0]}–{selected_age[1]})"),
-   labels={"Heart Rate": "Average Heart Rate"},
-   custom_data=["Gender"]
-)
-fig_line.update_traces(
-   hovertemplate='<b>Age: %{x}</b><br>Avg HR: %{y:.1f}<br>Gender: %{customdata[0]}<extra></extra>',
-   line=dict(width=2)
-)
-fig_line.update_layout(
-   legend_title_text='Gender',
-   height=400,
-   margin=dict(l=10, r=10, t=40, b=20),
-   font=dict(family="Merriweather, serif", size=12),
-   title_font_family="Merriweather, serif",
-   title_font_size=24 
-)
-st.plotly_chart(fig_line, use_container_width=True)
+# Finished figures are cached on their inputs; the occupation selectbox cannot change this chart.
+version = dataset_version()
+with span("build_line_chart"):
+   fig_line = cached_figure(
+      plot_key("heart_rate_line", filter_spec, None, version),
+      lambda: heart_rate_line(cube, filter_spec),
+   )
+with span("emit_line_chart"):
+   st.plotly_chart(fig_line, use_container_width=True)
 
 # ---------- SECTION 2: Sleep Quality Bar Chart ----------
-occupations = sorted(filtered_df['Occupation'].dropna().unique())
-occupation_options = ['All'] + occupations
-selected_occupation = st.selectbox("🔎 Select an Occupation", occupation_options, key="bar_occupation_filter")
-bar_df = filtered_df.copy() if selected_occupation == 'All' else filtered_df[filtered_df['Occupation'] == selected_occupation].copy()
-bar_df['Quality of Sleep'] = bar_df['Quality of Sleep'].astype(str)
-
-if bar_df.empty:
-   st.warning("⚠️ No data for the selected occupation and age range.")
-else:
-   sleep_counts = bar_df.groupby(['Occupation', 'Quality of Sleep'], observed=False).size().reset_index(name='Count')
-   sleep_order = ['4', '5', '6', '7', '8', '9']
-   sleep_colors = {
-       '4': '#F7D794', '5': '#A7C7E7', '6': '#E6A1B3',
-       '7': '#E66A6A', '8': '#FF7F00', '9': '#5E548E'
-   }
-   fig_bar = px.bar(
-       sleep_counts,
-       x='Occupation',
-       y='Count',
-       color='Quality of Sleep',
-       barmode='group',
-       title=" Distribution of Sleep Quality Across Occupations" + ("" if selected_occupation == 'All' else f" – {selected_occupation}"),
-       labels={'Quality of Sleep': 'Sleep Quality', 'Occupation': 'Occupation'},
-       category_orders={'Quality of Sleep': sleep_order},
-       color_discrete_map=sleep_colors
-   )
-   fig_bar.update_layout(
-       xaxis_tickangle=0,
-       xaxis_title="Occupation",
-       yaxis_title="Count",
-       font=dict(family="Merriweather, serif", size=12),
-       title_font_family="Merriweather, serif",
-       title_font_size=24, 
-       height=400
-   )
-   st.plotly_chart(fig_bar, use_container_width=True)
-
-# -------------------- ANALYTICAL UTILS --------------------
-def badge(text, color="#FFD700"):
-   return f'<span style="background-color:{color}; color:black; padding:3px 8px; border-radius:8px; font-size:13px;">{text}</span>'
-
-def colored_number(value):
-   try:
-       val = float(value)
-       if val < 60:
-           color = "#668fd4"
-       elif val < 80:
-           color = "#fa9850"
-       else:
-           color = "#e4444e"
-       return f'<span style="color:{color}; font-weight:bold;">{val:.1f}</span> bpm'
-   except:
-       return '<span style="color:gray;">N/A</span>'
+# A fragment: the occupation selectbox reruns only this section. Its inputs are
+# passed in explicitly; Streamlit replays them when the fragment reruns alone.
+@st.fragment
+def sleep_quality_section(cube, spec, occupations, version):
+   with fragment_run("Work & Wellness Sleep Metrics · sleep quality"):
+      occupation_options = ['All'] + occupations
+      selected_occupation = st.selectbox("🔎 Select an Occupation", occupation_options, key="bar_occupation_filter")
+      with span("build_bar_chart"):
+         fig_bar = cached_figure(
+            plot_key("sleep_quality_bar", spec, selected_occupation, version),
+            lambda: sleep_quality_bar(cube, selected_occupation, spec),
+         )
+
+      if fig_bar is None:
+         st.warning("⚠️ No data for the selected occupation and age range.")
+      else:
+         with span("emit_bar_chart"):
+            st.plotly_chart(fig_bar, use_container_width=True)
+
+sleep_quality_section(cube, filter_spec, sorted(occupation_counts['Occupation'].dropna()), version)
 
 # -------------------- ANALYTICAL SUMMARY --------------------
-def generate_analytical_summary(filtered_df):
-   if filtered_df.empty:
+@traced()
+def generate_analytical_summary(totals, occupation_counts):
+   if totals['count'] == 0:
        return "⚠️ <em>No summary available due to current filters.</em>"
 
-   avg_hr = filtered_df['Heart Rate'].mean()
-   avg_sleep = filtered_df['Sleep Duration'].mean()
+   avg_hr = totals['Heart Rate_mean']
+   avg_sleep = totals['Sleep Duration_mean']
+   # Ties go to the occupation whose first row comes earliest, as value_counts().idxmax() picks them.
+   known_occupations = occupation_counts.dropna(subset=['Occupation'])
    top_occupation = (
-       filtered_df['Occupation'].value_counts().idxmax()
-       if not filtered_df['Occupation'].isnull().all()
+       known_occupations.sort_values(['count', FIRST_ROW], ascending=[False, True])['Occupation'].iloc[0]
+       if not known_occupations.empty
        else None
    )
 
    summary = (
-       f"🔹 The average heart rate recorded is {colored_number(avg_hr)}, reflecting overall cardiovascular activity in this group.<br><br>"
+       f"🔹 The average heart rate recorded is {colored_heart_rate(avg_hr)}, reflecting overall cardiovascular activity in this group.<br><br>"
        f"🔹 Participants typically sleep around <strong style='color:#20B2AA'>{avg_sleep:.1f} hours</strong> per night, which can significantly impact their health and stress levels.<br><br>"
    )
 
@@ -244,30 +210,10 @@ def generate_analytical_summary(filtered_df):
    return summary
 
 # -------------------- DEMOGRAPHIC INSIGHTS --------------------
-def generate_demographic_insights(df):
-   insights = ""
-
-   if df.empty:
-       return "⚠️ <em>No demographic data available based on current filters.</em>"
-
-   if 'Gender' in df.columns and not df['Gender'].isnull().all():
-       gender_stats = df.groupby('Gender', observed=False)['Heart Rate'].mean()
-       insights += "<strong>🔸 Average Heart Rate by Gender:</strong><br>"
-       for gender, hr in gender_stats.items():
-           insights += f"- {gender}: {colored_number(hr) if pd.notna(hr) else '<span style=\"color:gray;\">No data</span>'}<br>"
-   else:
-       insights += "⚠️ Gender data is not available.<br>"
-
-   if 'Age' in df.columns:
-       df = df.copy()
-       df = df[df['Age'] < 60] 
-       df['Age Group'] = pd.cut(df['Age'], bins=[0, 25, 40, 60], labels=["<25", "25–40", "40–60"])
-       group_stats = df.groupby('Age Group', observed=False)['Heart Rate'].mean()
-       insights += "<br><strong>🔸 Heart Rate by Age Group:</strong><br>"
-       for age_group, hr in group_stats.items():
-           insights += f"- Age {age_group}: {colored_number(hr) if pd.notna(hr) else '<span style=\"color:gray;\">No data</span>'}<br>"
-
-   return insights
+@traced()
+def generate_demographic_insights(cube, spec):
+   rows, by_gender, by_age = heart_rate_profile(cube, **spec.query())
+   return heart_rate_insight_html(rows, by_gender, by_age)
 
 # -------------------- DISPLAY SUMMARIES --------------------
 st.markdown("---")
@@ -276,7 +222,7 @@ st.markdown("This analytical summary is displayed based on the chosen filter cri
 col_a, col_b = st.columns(2)
 
 with col_a:
-   general_summary = generate_analytical_summary(filtered_df)
+   general_summary = generate_analytical_summary(kpi_totals, occupation_counts)
    st.markdown(
        f"""
        <div class="hover-box" style="padding:20px; background-color:#f9f9f9; border-left: 5px solid #9E122C; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
@@ -296,7 +242,7 @@ with col_a:
    )
 
 with col_b:
-   demographic_summary = generate_demographic_insights(filtered_df)
+   demographic_summary = generate_demographic_insights(cube, filter_spec)
    st.markdown(
        f"""
        <div class="hover-box" style="padding:20px; background-color:white; border-left: 5px solid #FBCB77; border-radius:10px; box-shadow: 2px 2px 8px rgba(0, 0, 0, 0.05);">
@@ -309,6 +255,9 @@ with col_b:
 # -------------------- RAW DATA --------------------
 with st.expander("View Filtered Raw Data"):
    st.caption("Filtered dataset preview:")
-   st.dataframe(filtered_df.reset_index(drop=True), use_container_width=True)
+   with span("emit_dataframe"):
+       paginated_preview(filtered_view, "wellness_raw_preview")
+
+finish_with_panel()
 
 
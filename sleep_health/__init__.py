@@ -0,0 +1,12 @@
+# Shared data layer for the Sleep Health & Lifestyle pages.
+
+import os
+
+# SLEEP_HEALTH_PRELOAD=1 imports the heavy page dependencies in a background
+# thread as soon as the package is first imported. startup is only imported
+# when asked to, so `python -m sleep_health.startup` does not find itself
+# already imported.
+if os.environ.get("SLEEP_HEALTH_PRELOAD") == "1":
+    from sleep_health.startup import preload
+
+    preload()
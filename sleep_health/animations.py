@@ -0,0 +1,177 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sleep_health.snapshot import ROOT
+
+# -------------------- SETTINGS --------------------
+CACHE_DIR = ROOT / ".cache" / "lottie"
+ANIMATIONS = ("sleepy.json", "contact.json", "panda_sleep.json")
+
+# Decimals kept for every float; keyframe values, bezier handles and timings
+# are all drawn at screen resolution, so three places are visually lossless.
+PRECISION = 3
+# Authoring metadata that the lottie-web player never reads.
+DROP_KEYS = ("meta", "mn")
+# Bump when minify() changes so cached files are rebuilt.
+MINIFY_VERSION = 1
+
+_lock = threading.Lock()
+_loaded = {}
+_reports = {}
+
+
+# -------------------- MINIFY --------------------
+def _round(value):
+    if isinstance(value, float):
+        value = round(value, PRECISION)
+        return int(value) if value.is_integer() else value
+    if isinstance(value, list):
+        return [_round(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _round(item) for key, item in value.items() if key not in DROP_KEYS}
+    return value
+
+
+def _strip_layers(layers, window=None) -> tuple:
+    """Drop hidden layers and layers outside the composition's frame window.
+
+    Layers used as a parent or as a track matte source are kept even when
+    hidden, since other layers depend on them.
+    """
+    parents = {layer.get("parent") for layer in layers}
+    kept = []
+    for layer in layers:
+        hidden = layer.get("hd") is True
+        outside = window is not None and (layer.get("op", window[1]) <= window[0] or layer.get("ip", window[0]) >= window[1])
+        needed = layer.get("ind") in parents or layer.get("td")
+        if (hidden or outside) and not needed:
+            continue
+        kept.append(layer)
+    return kept, len(layers) - len(kept)
+
+
+def _referenced_assets(layers, assets) -> set:
+    by_id = {asset.get("id"): asset for asset in assets}
+    used, pending = set(), [layer.get("refId") for layer in layers]
+    while pending:
+        ref = pending.pop()
+        if ref is None or ref in used or ref not in by_id:
+            continue
+        used.add(ref)
+        pending += [layer.get("refId") for layer in by_id[ref].get("layers", [])]
+    return used
+
+
+def _recompress_image(asset: dict):
+    """Re-encode an embedded raster asset as lossless WebP when that is smaller."""
+    prefix, _, payload = asset.get("p", "").partition(";base64,")
+    if asset.get("e") != 1 or not prefix.startswith("data:image/") or not payload:
+        return
+    from PIL import Image
+
+    with Image.open(io.BytesIO(base64.b64decode(payload))) as image:
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", lossless=True, method=6)
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    if len(encoded) < len(payload):
+        asset["p"] = f"data:image/webp;base64,{encoded}"
+
+
+def minify(animation: dict) -> tuple:
+    """Minified copy of a Lottie document and the number of layers removed.
+
+    Floats are rounded, unused layers and assets dropped, and embedded
+    images re-encoded as lossless WebP.
+    """
+    animation = _round(animation)
+    animation["layers"], removed = _strip_layers(animation.get("layers", []), (animation.get("ip", 0), animation.get("op", 0)))
+    assets = animation.get("assets", [])
+    for asset in assets:
+        if "layers" in asset:
+            asset["layers"], dropped = _strip_layers(asset["layers"])
+            removed += dropped
+    used = _referenced_assets(animation["layers"], assets)
+    animation["assets"] = [asset for asset in assets if asset.get("id") in used]
+    for asset in animation["assets"]:
+        _recompress_image(asset)
+    for key in ("markers", "fonts", "chars"):
+        if animation.get(key) in ([], {"list": []}):
+            animation.pop(key)
+    return animation, removed
+
+
+def _dumps(animation: dict) -> str:
+    return json.dumps(animation, separators=(",", ":"), ensure_ascii=False)
+
+
+# -------------------- LOAD --------------------
+def _minified_path(source: Path) -> Path:
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()[:16]
+    return CACHE_DIR / f"{source.stem}-{digest}-v{MINIFY_VERSION}p{PRECISION}.json"
+
+
+def _build(source: Path) -> dict:
+    started = time.perf_counter()
+    original = source.read_text(encoding="utf-8")
+    animation, removed = minify(json.loads(original))
+    text = _dumps(animation)
+    target = _minified_path(source)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=CACHE_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, target)
+    return {
+        "file": source.name,
+        "original_bytes": len(original.encode()),
+        "minified_bytes": len(text.encode()),
+        "layers_removed": removed,
+        "build_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def load_lottie(name: str) -> dict:
+    """Minified animation, parsed once per process; the minified JSON is kept on disk."""
+    if name not in _loaded:
+        with _lock:
+            if name not in _loaded:
+                source = ROOT / name
+                target = _minified_path(source)
+                report = None if target.is_file() else _build(source)
+                started = time.perf_counter()
+                _loaded[name] = json.loads(target.read_text(encoding="utf-8"))
+                report = report or {"file": name, "original_bytes": source.stat().st_size, "minified_bytes": target.stat().st_size}
+                report["parse_ms"] = (time.perf_counter() - started) * 1000
+                _reports[name] = report
+    return _loaded[name]
+
+
+def size_report() -> list:
+    """One entry per animation loaded in this process."""
+    return [dict(report) for report in _reports.values()]
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Minify the Lottie animations and report their sizes.")
+    parser.add_argument("files", nargs="*", default=list(ANIMATIONS))
+    args = parser.parse_args()
+    for name in args.files:
+        report = _build(ROOT / name)
+        saving = 1 - report["minified_bytes"] / report["original_bytes"]
+        print(
+            f"{name}: {report['original_bytes'] / 1024:.1f} KB -> {report['minified_bytes'] / 1024:.1f} KB "
+            f"({saving:.0%} smaller, {report['layers_removed']} layers removed)"
+        )
+
+
+if __name__ == "__main__":
+    main()
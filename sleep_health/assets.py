@@ -0,0 +1,210 @@
+import argparse
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from sleep_health.snapshot import ROOT
+
+# -------------------- LAYOUT --------------------
+# Streamlit serves ROOT/static at app/static/ when server.enableStaticServing is
+# on. Variants are named after the source's content hash, so a URL never
+# changes meaning and browsers can keep it (Streamlit answers revalidations
+# with ETag / Last-Modified).
+STATIC_DIR = ROOT / "static"
+IMAGE_DIR = STATIC_DIR / "img"
+IMAGE_URL = "app/static/img"
+MANIFEST = IMAGE_DIR / "manifest.json"
+AUDIO_DIR = STATIC_DIR / "audio"
+AUDIO_URL = "app/static/audio"
+
+# source file -> (width, height, crop). Team photos are shown in 220x220 cards,
+# so they get a 2x square crop; the background only needs to cover a screen.
+IMAGES = {
+    "cafe.jpg": (1920, 1280, False),
+    "Hien.jpg": (440, 440, True),
+    "Ngoc.jpg": (440, 440, True),
+    "quynh.jpg": (440, 440, True),
+    "linh.jpg": (440, 440, True),
+    "kiet.jpg": (440, 440, True),
+}
+
+# Preferred first; JPEG is the fallback every browser understands.
+FORMATS = (
+    ("avif", "AVIF", {"quality": 55}),
+    ("webp", "WEBP", {"quality": 78, "method": 6}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+MIME = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg", "mp3": "audio/mpeg"}
+
+mimetypes.add_type("image/avif", ".avif")
+mimetypes.add_type("image/webp", ".webp")
+
+_lock = threading.Lock()
+_variants = {}
+_audio = {}
+
+
+# -------------------- BUILD --------------------
+def _supported(pil_format: str) -> bool:
+    from PIL import features
+
+    return pil_format != "AVIF" or bool(features.check("avif"))
+
+
+def _source_digest(path: Path, spec) -> str:
+    sha = hashlib.sha256(json.dumps(spec).encode())
+    sha.update(path.read_bytes())
+    return sha.hexdigest()[:12]
+
+
+def _read_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes):
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def build_image(name: str, manifest: dict) -> dict:
+    """Resized, recompressed variants of one source image: {ext: file name}."""
+    from PIL import Image, ImageOps
+
+    source = ROOT / name
+    width, height, crop = IMAGES[name]
+    digest = _source_digest(source, IMAGES[name])
+    entry = manifest.get(name)
+    if entry and entry["digest"] == digest and all((IMAGE_DIR / f).is_file() for f in entry["files"].values()):
+        return entry["files"]
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if crop:
+            image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+        files = {}
+        for ext, pil_format, options in FORMATS:
+            if not _supported(pil_format):
+                continue
+            out = IMAGE_DIR / f"{Path(name).stem}-{digest}.{ext}"
+            if not out.is_file():
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, **options)
+                _write_atomic(out, buffer.getvalue())
+            files[ext] = out.name
+    manifest[name] = {"digest": digest, "size": [image.width, image.height], "files": files}
+    return files
+
+
+def build_all(names=None) -> dict:
+    """Build every configured image and rewrite the manifest; returns the manifest."""
+    IMAGE_DIR.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        manifest = _read_manifest()
+        for name in names or IMAGES:
+            build_image(name, manifest)
+        _write_atomic(MANIFEST, json.dumps(manifest, indent=2).encode())
+        return manifest
+
+
+# -------------------- URLS --------------------
+def image_urls(name: str) -> dict:
+    """{ext: static URL} for a source image, building its variants on first use."""
+    if name not in _variants:
+        manifest = _read_manifest()
+        entry = manifest.get(name)
+        if not entry or not all((IMAGE_DIR / f).is_file() for f in entry["files"].values()):
+            entry = build_all([name])[name]
+        _variants[name] = {ext: f"{IMAGE_URL}/{file}" for ext, file in entry["files"].items()}
+    return _variants[name]
+
+
+def picture_html(name: str, alt: str = "") -> str:
+    """<picture> with AVIF/WebP sources and a JPEG <img> fallback."""
+    urls = image_urls(name)
+    sources = "".join(
+        f'<source type="{MIME[ext]}" srcset="{urls[ext]}">' for ext in ("avif", "webp") if ext in urls
+    )
+    return f'<picture>{sources}<img src="{urls["jpg"]}" alt="{alt}" loading="lazy" decoding="async"></picture>'
+
+
+def background_layers(name: str) -> tuple:
+    """(fallback, preferred) CSS image values: a plain JPEG url() and an image-set().
+
+    Declare the fallback first; browsers without image-set() ignore the second
+    declaration and keep the JPEG.
+    """
+    urls = image_urls(name)
+    options = ", ".join(f'url("{urls[ext]}") type("{MIME[ext]}")' for ext in ("avif", "webp", "jpg") if ext in urls)
+    return f'url("{urls["jpg"]}")', f"image-set({options})"
+
+
+# -------------------- AUDIO --------------------
+def audio_url(name: str):
+    """Static URL of an audio file kept in the repo root, or None if it is absent.
+
+    The file is published under a content-hashed name; Streamlit's static
+    route answers Range requests, so players stream it instead of receiving
+    the whole file inline.
+    """
+    source = ROOT / name
+    if not source.is_file():
+        return None
+    stat = source.stat()
+    stamp = (str(source), stat.st_size, stat.st_mtime_ns)
+    if stamp not in _audio:
+        sha = hashlib.sha256()
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        published = AUDIO_DIR / f"{source.stem}-{sha.hexdigest()[:12]}{source.suffix}"
+        if not published.is_file():
+            AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=AUDIO_DIR)
+            os.close(fd)
+            shutil.copyfile(source, tmp)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, published)
+        _audio[stamp] = f"{AUDIO_URL}/{published.name}"
+    return _audio[stamp]
+
+
+def audio_html(name: str, loop: bool = True) -> str:
+    """Autoplaying <audio> that streams the file, or "" when the file is missing.
+
+    preload="none" keeps the browser from fetching anything before playback
+    starts, so the page paints first.
+    """
+    url = audio_url(name)
+    if url is None:
+        return ""
+    mime = MIME.get(Path(name).suffix.lstrip(".").lower(), "audio/mpeg")
+    return f'<audio autoplay{" loop" if loop else ""} preload="none"><source src="{url}" type="{mime}"></audio>'
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Build the resized image variants served from static/img.")
+    parser.parse_args()
+    manifest = build_all()
+    for name, entry in manifest.items():
+        source = (ROOT / name).stat().st_size
+        sizes = ", ".join(f"{ext} {(IMAGE_DIR / file).stat().st_size / 1024:.0f} KB" for ext, file in entry["files"].items())
+        print(f"{name}: {source / 1024:.0f} KB -> {entry['size'][0]}x{entry['size'][1]} ({sizes})")
+
+
+if __name__ == "__main__":
+    main()
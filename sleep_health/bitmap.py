@@ -0,0 +1,166 @@
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sleep_health.cube import COMPLETE_COLUMNS
+from sleep_health.snapshot import FORMAT_VERSION, is_snapshot, publish, read_meta
+
+# -------------------- INDEXED COLUMNS --------------------
+FILTER_COLUMNS = ("Gender", "Sleep Disorder", "Nationality", "Occupation")
+RANGE_COLUMN = "Age"
+
+# Saved next to the snapshot it indexes; the name changes with the layout.
+INDEX_DIR = f"bitmap-v{FORMAT_VERSION}"
+
+# Fixed predicates used by the sidebar checkboxes on the Work & Wellness page;
+# "complete" is the rows that page keeps (no gaps in COMPLETE_COLUMNS).
+FLAG_PREDICATES = {
+    "poor_sleep": lambda df: df["Quality of Sleep"] <= 6,
+    "high_hr": lambda df: df["Heart Rate"] > 80,
+    "complete": lambda df: df[list(COMPLETE_COLUMNS)].notna().all(axis=1),
+}
+
+
+# -------------------- BITSET HELPERS --------------------
+def pack(mask) -> np.ndarray:
+    """Pack a boolean mask into little-endian uint64 words (unused tail bits are 0)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder="little")
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def unpack_ids(words: np.ndarray, rows: int) -> np.ndarray:
+    """Row ids of the set bits, in ascending order."""
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), count=rows, bitorder="little"))
+
+
+# -------------------- INDEX --------------------
+class BitmapIndex:
+    """One bitset per categorical value, cumulative bitsets over the sorted Age values
+    and one bitset per fixed flag. Every filter is a handful of word-wise ANDs."""
+
+    def __init__(self, df: pd.DataFrame, columns=FILTER_COLUMNS, range_column=RANGE_COLUMN):
+        self.rows = len(df)
+        self.words = -(-self.rows // 64)
+
+        self.values = {}
+        for name in columns:
+            codes, uniques = pd.factorize(df[name], use_na_sentinel=True)
+            self.values[name] = {value: pack(codes == i) for i, value in enumerate(uniques)}
+
+        # Age: sorted distinct values and, for each, the bitset of rows with Age <= value.
+        ages = df[range_column].to_numpy()
+        order = np.argsort(ages, kind="stable")
+        sorted_ages = ages[order]
+        self.range_column = range_column
+        self.range_values = np.unique(sorted_ages)
+        mask = np.zeros(self.rows, dtype=bool)
+        self.at_most = []
+        start = 0
+        for value in self.range_values:
+            stop = np.searchsorted(sorted_ages, value, side="right")
+            mask[order[start:stop]] = True
+            self.at_most.append(pack(mask))
+            start = stop
+
+        self.flags = {name: pack(predicate(df).to_numpy()) for name, predicate in FLAG_PREDICATES.items()}
+
+    # -------------------- PERSISTENCE --------------------
+    def save(self, target) -> Path:
+        """Write every bitset as one row of a single .npy matrix plus a JSON layout."""
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=target.parent))
+        os.chmod(tmp, 0o755)
+        bitsets = [bits for by_value in self.values.values() for bits in by_value.values()]
+        bitsets += self.at_most + list(self.flags.values())
+        matrix = np.lib.format.open_memmap(tmp / "bits.npy", mode="w+", dtype=np.uint64, shape=(len(bitsets), self.words))
+        for i, bits in enumerate(bitsets):
+            matrix[i] = bits
+        matrix.flush()
+        del matrix
+        meta = {
+            "rows": self.rows,
+            "values": {column: list(by_value) for column, by_value in self.values.items()},
+            "range_column": self.range_column,
+            "range_values": self.range_values.tolist(),
+            "flags": list(self.flags),
+        }
+        return publish(tmp, target, meta)
+
+    @classmethod
+    def load(cls, target) -> "BitmapIndex":
+        """Index over a saved bitset matrix, memory-mapped read-only."""
+        target = Path(target)
+        meta = read_meta(target)
+        matrix = np.load(target / "bits.npy", mmap_mode="r")
+        rows = iter(matrix)
+        index = cls.__new__(cls)
+        index.rows = meta["rows"]
+        index.words = matrix.shape[1]
+        index.values = {column: {value: next(rows) for value in values} for column, values in meta["values"].items()}
+        index.range_column = meta["range_column"]
+        index.range_values = np.array(meta["range_values"])
+        index.at_most = [next(rows) for _ in index.range_values]
+        index.flags = {name: next(rows) for name in meta["flags"]}
+        return index
+
+    @classmethod
+    def open(cls, snapshot, load_frame) -> "BitmapIndex":
+        """Memory-mapped index stored in the snapshot directory, built on first use."""
+        target = Path(snapshot) / INDEX_DIR
+        if not is_snapshot(target):
+            cls(load_frame()).save(target)
+        return cls.load(target)
+
+    # -------------------- QUERY --------------------
+    def options(self, column: str) -> list:
+        return sorted(self.values[column])
+
+    def range_bits(self, low, high):
+        """Bitset of rows with low <= value <= high, or None when the range covers every row."""
+        if not len(self.range_values):
+            return None
+        upper = np.searchsorted(self.range_values, high, side="right") - 1
+        lower = np.searchsorted(self.range_values, low, side="left") - 1
+        if upper < 0 or lower >= upper:
+            return np.zeros(self.words, dtype=np.uint64)
+        if upper == len(self.range_values) - 1 and lower < 0:
+            return None
+        if lower < 0:
+            return self.at_most[upper]
+        return self.at_most[upper] & ~self.at_most[lower]
+
+    def bits(self, equals=None, value_range=None, flags=()):
+        """Combined bitset for the filters, or None when nothing filters out any row.
+
+        ``equals`` maps a column to its selected values; an empty selection means
+        "no filter", matching how the sidebar multiselects behave.
+        """
+        result = None
+        for column, selected in (equals or {}).items():
+            if not selected:
+                continue
+            column_bits = np.zeros(self.words, dtype=np.uint64)
+            for value in selected:
+                if value in self.values[column]:
+                    column_bits |= self.values[column][value]
+            result = column_bits if result is None else np.bitwise_and(result, column_bits, out=result)
+        if value_range is not None:
+            age_bits = self.range_bits(*value_range)
+            if age_bits is not None:
+                result = age_bits.copy() if result is None else np.bitwise_and(result, age_bits, out=result)
+        for name in flags:
+            result = self.flags[name].copy() if result is None else np.bitwise_and(result, self.flags[name], out=result)
+        return result
+
+    def select(self, equals=None, value_range=None, flags=()) -> np.ndarray:
+        """Row ids (ascending) matching every filter."""
+        bits = self.bits(equals, value_range, flags)
+        if bits is None:
+            return np.arange(self.rows)
+        return unpack_ids(bits, self.rows)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+
+# Every ByteLRU in the process, for the diagnostics panel.
+_registry = weakref.WeakSet()
+
+
+# -------------------- KEYS --------------------
+def canonical_key(*parts) -> str:
+    """Stable hash of JSON-like parts; lists and tuples compare by content."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# -------------------- BYTE-BOUNDED LRU --------------------
+class ByteLRU:
+    """Thread-safe LRU of encoded values, bounded by their total size in bytes.
+
+    Values are bytes/str (or None for "nothing to show") unless ``sizeof``
+    says how to measure them; the oldest entries are evicted until the new
+    entry fits. Entries larger than the whole budget are returned but never
+    stored.
+    """
+
+    def __init__(self, max_bytes: int, name: str = "cache", sizeof=len):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        _registry.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        """(True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        nbytes = self.sizeof(value) if value is not None else 0
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            while self._entries and self.size + nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+            self._entries[key] = (value, nbytes)
+            self.size += nbytes
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, computing and storing it on a miss."""
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cache_stats() -> list:
+    """stats() of every live ByteLRU, by name."""
+    return sorted((cache.stats() for cache in list(_registry)), key=lambda stats: stats["name"])
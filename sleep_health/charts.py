@@ -0,0 +1,125 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sleep_health.cache import ByteLRU, canonical_key
+from sleep_health.density import ridge_densities
+from sleep_health.insights import DISORDER_COLORS, DISORDER_ORDER
+from sleep_health.startup import load
+from sleep_health.tracing import traced
+
+# -------------------- CONSTANTS --------------------
+RIDGE_COLOR_MAP = {'Sleep Apnea': '#A7C7E7', 'Insomnia': '#FFD1A9', 'None': '#E66A6A'}
+
+# Shared by every session: chart and insight work runs here, off the script thread.
+CHART_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="charts")
+
+# Rendered PNGs keyed on the filter state, shared by every session.
+FIGURE_CACHE = ByteLRU(int(os.environ.get("SLEEP_HEALTH_FIGURE_CACHE_MB", "64")) << 20, name="figures")
+
+
+# -------------------- RENDERING --------------------
+def new_figure(figsize):
+    """A detached matplotlib Figure (no pyplot, no backend state).
+
+    matplotlib is imported here, on the first chart that is actually drawn,
+    rather than when the page imports this module.
+    """
+    return load("matplotlib.figure").Figure(figsize=figsize)
+
+
+def figure_png(fig) -> bytes:
+    """Rasterize a figure the way st.pyplot does (tight bbox, 200 dpi)."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+@traced()
+def render_pie_chart(counts) -> bytes:
+    """PNG of the disorder proportions; ``counts`` holds only the non-zero disorders."""
+    fig = new_figure((6, 6))
+    ax = fig.subplots()
+    wedges, _, _ = ax.pie(
+        counts,
+        colors=[DISORDER_COLORS[k] for k in counts.index],
+        autopct='%1.1f%%',
+        startangle=140,
+        textprops={'fontsize': 13},
+        wedgeprops={'edgecolor': 'white', 'linewidth': 1.5},
+        pctdistance=0.8
+    )
+    for i, wedge in enumerate(wedges):
+        ang = (wedge.theta2 + wedge.theta1) / 2
+        x, y = np.cos(np.deg2rad(ang)), np.sin(np.deg2rad(ang))
+        ha = "right" if x < 0 else "left"
+        ax.annotate(
+            counts.index[i],
+            xy=(x, y),
+            xytext=(1.1 * np.sign(x), 1.05 * y),
+            ha=ha, va="center",
+            fontsize=14,
+            bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", lw=0.5),
+            arrowprops=dict(arrowstyle="-", color="gray")
+        )
+    ax.axis('equal')
+    return figure_png(fig)
+
+
+@traced()
+def render_ridgeline(view):
+    """PNG of the stress distribution per disorder, or None when there is too little data.
+
+    Densities come from per-disorder Stress Level counts (sleep_health.density),
+    so drawing cost does not grow with the number of filtered rows.
+    """
+    grid, curves = ridge_densities(view.column('Sleep Disorder'), view.column('Stress Level'), DISORDER_ORDER)
+    if not curves:
+        return None
+    fig = new_figure((8, 6))
+    axes = fig.subplots(len(curves), 1, sharex=True, squeeze=False)[:, 0]
+    for i, (ax, (disorder, curve)) in enumerate(zip(axes, curves.items())):
+        alpha = 0.4 + (1 + i) * 0.6 / len(curves)
+        ax.fill_between(grid, 0.0, curve, color=RIDGE_COLOR_MAP[disorder], alpha=alpha, zorder=i)
+        ax.plot(grid, np.zeros_like(grid), color=RIDGE_COLOR_MAP[disorder], alpha=alpha, zorder=i)
+        ax.plot(grid, curve, color='k', alpha=alpha, zorder=i)
+        ax.set_yticks([0])
+        ax.set_yticklabels([disorder])
+        ax.yaxis.grid(False)
+        ax.patch.set_alpha(0)
+        ax.set_xlim(grid[0], grid[-1])
+        ax.tick_params(axis='both', which='both', length=0, pad=10)
+        ax.xaxis.set_visible(False)
+        ax.set_frame_on(False)
+    top = max(ax.get_ylim()[1] for ax in axes)
+    bottom = min(ax.get_ylim()[0] for ax in axes)
+    for ax in axes:
+        ax.set_ylim(bottom - 0.1 * (top - bottom), top)
+
+    # One transparent axis behind the ridges carries the shared x ticks and label.
+    base = fig.add_subplot(1, 1, 1)
+    base.set_zorder(min(ax.get_zorder() for ax in axes) - 1)
+    for side in base.spines.values():
+        side.set_visible(False)
+    base.set_xlim(axes[0].get_xlim())
+    base.set_xticks(axes[0].get_xticks()[1:-1])
+    base.yaxis.set_visible(False)
+    base.set_xlabel('Stress Level', fontsize=14)
+    fig.tight_layout()
+    return figure_png(fig)
+
+
+# -------------------- CACHED RENDERING --------------------
+def figure_key(spec, version) -> str:
+    """Canonical key of a FilterSpec and dataset version."""
+    return canonical_key(spec.parts(), version)
+
+
+def cached_pie_chart(key: str, counts) -> bytes:
+    return FIGURE_CACHE.get_or_compute(("pie", key), lambda: render_pie_chart(counts))
+
+
+def cached_ridgeline(key: str, view):
+    return FIGURE_CACHE.get_or_compute(("ridgeline", key), lambda: render_ridgeline(view))
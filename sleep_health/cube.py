@@ -0,0 +1,173 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sleep_health.snapshot import FORMAT_VERSION, is_snapshot, read_meta, read_snapshot, write_columns
+
+# -------------------- CUBE LAYOUT --------------------
+DIMENSIONS = ("Gender", "Age", "Sleep Disorder", "Occupation", "Quality of Sleep", "Nationality", "High HR", "Complete")
+MEASURES = ("Stress Level", "Heart Rate", "Sleep Duration")
+# Smallest row id in each cell: lets "most common" break ties by first
+# appearance, as value_counts().idxmax() does on rows. rollup() takes its min.
+FIRST_ROW = "first_row"
+
+# Heart Rate is a measure, so the page 4 "> 80 bpm" checkbox needs its own
+# boolean dimension to be answerable from the cells.
+HIGH_HR_THRESHOLD = 80
+POOR_SLEEP_MAX = 6
+# The Work & Wellness page leaves out rows missing any of these; the
+# "complete" flag marks the rows it keeps.
+COMPLETE_COLUMNS = ("Age", "Gender", "Heart Rate", "Occupation", "Sleep Duration", "Quality of Sleep")
+
+# Saved next to the snapshot it summarizes; the name changes with the layout.
+CUBE_DIR = f"cube-v{FORMAT_VERSION}"
+
+
+# -------------------- DATA CUBE --------------------
+class DataCube:
+    """count, and sum and non-blank count of each measure, per distinct dimension cell.
+
+    Any filter on the dimensions is answered by masking and rolling up cells,
+    so query cost depends on the number of occupied cells, not on row count.
+    Each mean divides the measure's sum by its own ``<measure>_n``, so blank
+    cells do not pull it down.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        keys = [df[name] for name in DIMENSIONS if name not in ("High HR", "Complete")]
+        keys.append((df["Heart Rate"] > HIGH_HR_THRESHOLD).rename("High HR"))
+        keys.append(df[list(COMPLETE_COLUMNS)].notna().all(axis=1).rename("Complete"))
+        values = {"count": np.ones(len(df), dtype=np.int64)}
+        for name in MEASURES:
+            measure = df[name].to_numpy(dtype=np.float64)
+            values[f"{name}_sum"] = measure
+            values[f"{name}_n"] = (~np.isnan(measure)).astype(np.int64)
+        values[FIRST_ROW] = np.arange(len(df), dtype=np.int64)
+        grouped = pd.DataFrame(values, index=df.index).groupby(
+            keys, observed=True, dropna=False, sort=False
+        )
+        self.cells = grouped.agg({name: "min" if name == FIRST_ROW else "sum" for name in values}).reset_index()
+        self.rows = len(df)
+
+    # -------------------- PERSISTENCE --------------------
+    def save(self, target) -> Path:
+        return write_columns(target, self.cells, source_rows=self.rows)
+
+    @classmethod
+    def load(cls, target) -> "DataCube":
+        """Cube over saved cells, memory-mapped read-only."""
+        cube = cls.__new__(cls)
+        cube.cells = read_snapshot(target)
+        cube.rows = read_meta(target)["source_rows"]
+        return cube
+
+    @classmethod
+    def open(cls, snapshot, load_frame) -> "DataCube":
+        """Memory-mapped cube stored in the snapshot directory, built on first use."""
+        target = Path(snapshot) / CUBE_DIR
+        if not is_snapshot(target):
+            cls(load_frame()).save(target)
+        return cls.load(target)
+
+    # -------------------- QUERY --------------------
+    def cell_mask(self, equals=None, value_range=None, flags=()) -> np.ndarray:
+        """Cells matching the same filter arguments as BitmapIndex.select."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for column, selected in (equals or {}).items():
+            if selected:
+                mask &= self.cells[column].isin(selected).to_numpy()
+        if value_range is not None:
+            mask &= self.cells["Age"].between(*value_range).to_numpy()
+        if "poor_sleep" in flags:
+            mask &= (self.cells["Quality of Sleep"] <= POOR_SLEEP_MAX).to_numpy()
+        if "high_hr" in flags:
+            mask &= self.cells["High HR"].to_numpy()
+        if "complete" in flags:
+            mask &= self.cells["Complete"].to_numpy()
+        return mask
+
+    def rollup(self, by=(), equals=None, value_range=None, flags=()) -> pd.DataFrame:
+        """Summed cells grouped by ``by`` with a ``<measure>_mean`` column per measure.
+
+        ``first_row`` is the smallest row id of each group rather than a sum.
+
+        With ``by=()`` the result is a single row of totals.
+        """
+        cells = self.cells[self.cell_mask(equals, value_range, flags)]
+        sums = cells.drop(columns=list(DIMENSIONS))
+        how = {name: "min" if name == FIRST_ROW else "sum" for name in sums.columns}
+        if by:
+            summed = sums.groupby([cells[name] for name in by], observed=True).agg(how).reset_index()
+        else:
+            summed = sums.agg(how).to_frame().T
+        summed = summed[summed["count"] > 0].reset_index(drop=True)
+        summed["count"] = summed["count"].astype(np.int64)
+        summed[FIRST_ROW] = summed[FIRST_ROW].astype(np.int64)
+        for name in MEASURES:
+            summed[f"{name}_n"] = summed[f"{name}_n"].astype(np.int64)
+            summed[f"{name}_mean"] = summed[f"{name}_sum"] / summed[f"{name}_n"].replace(0, np.nan)
+        return summed
+
+    def totals(self, equals=None, value_range=None, flags=()) -> pd.Series:
+        summed = self.rollup((), equals, value_range, flags)
+        if summed.empty:
+            return pd.Series({"count": 0, **{f"{name}_mean": np.nan for name in MEASURES}})
+        return summed.iloc[0]
+
+
+# -------------------- AGE PREFIX SUMS --------------------
+class AgePrefix:
+    """Cumulative count, sums and non-blank counts per age, stratified by Gender and the page 4 flags.
+
+    Totals for any inclusive age range are ``cum[high + 1] - cum[low]`` in
+    each selected stratum, so a slider tick costs a handful of lookups
+    whatever the row count. Built from the cube cells, not from rows; cells
+    without an Age never fall in a range and are left out.
+    """
+
+    COLUMNS = ("count",) + tuple(f"{name}_{part}" for name in MEASURES for part in ("sum", "n"))
+
+    def __init__(self, cube: DataCube):
+        cells = cube.cells[cube.cells["Age"].notna()]
+        self.genders = list(cells["Gender"].cat.categories)
+        ages = cells["Age"].to_numpy(dtype=np.int64)
+        self.min_age = int(ages.min()) if len(ages) else 0
+        self.max_age = int(ages.max()) if len(ages) else -1
+        gender = cells["Gender"].cat.codes.to_numpy(dtype=np.int64)
+        gender = np.where(gender < 0, len(self.genders), gender)  # missing Gender is its own stratum
+        poor = (cells["Quality of Sleep"] <= POOR_SLEEP_MAX).to_numpy(dtype=np.int64)
+        high = cells["High HR"].to_numpy(dtype=np.int64)
+        complete = cells["Complete"].to_numpy(dtype=np.int64)
+        shape = (len(self.genders) + 1, 2, 2, 2, self.max_age - self.min_age + 2)
+        self.cum = np.zeros((len(self.COLUMNS),) + shape)
+        for i, column in enumerate(self.COLUMNS):
+            np.add.at(self.cum[i], (gender, poor, high, complete, ages - self.min_age + 1), cells[column].to_numpy(dtype=np.float64))
+        np.cumsum(self.cum, axis=-1, out=self.cum)
+        self.cum.flags.writeable = False
+
+    def supports(self, equals=None, value_range=None, flags=()) -> bool:
+        return all(column == "Gender" or not selected for column, selected in (equals or {}).items())
+
+    def totals(self, equals=None, value_range=None, flags=()) -> pd.Series:
+        """Same result as DataCube.totals for filters on Gender, Age and the flags."""
+        if not self.supports(equals, value_range, flags):
+            raise ValueError("AgePrefix only filters on Gender, Age and the page flags")
+        selected = (equals or {}).get("Gender")
+        genders = [self.genders.index(g) for g in selected if g in self.genders] if selected else range(len(self.genders) + 1)
+        poor = [1] if "poor_sleep" in flags else [0, 1]
+        high = [1] if "high_hr" in flags else [0, 1]
+        complete = [1] if "complete" in flags else [0, 1]
+        low, high_age = value_range if value_range is not None else (self.min_age, self.max_age)
+        low = min(max(int(low), self.min_age), self.max_age + 1) - self.min_age
+        high_age = min(max(int(high_age), self.min_age - 1), self.max_age) - self.min_age + 1
+        sums = np.zeros(len(self.COLUMNS))
+        if high_age > low:
+            strata = self.cum[(slice(None),) + np.ix_(list(genders), poor, high, complete)]
+            sums = strata[..., high_age].sum(axis=(1, 2, 3, 4)) - strata[..., low].sum(axis=(1, 2, 3, 4))
+        result = dict(zip(self.COLUMNS, sums.tolist()))
+        result["count"] = int(round(result["count"]))
+        for name in MEASURES:
+            n = result[f"{name}_n"] = int(round(result[f"{name}_n"]))
+            result[f"{name}_mean"] = result[f"{name}_sum"] / n if n else np.nan
+        return pd.Series(result)
@@ -0,0 +1,51 @@
+import os
+from dataclasses import dataclass
+
+from sleep_health.cache import ByteLRU
+
+# -------------------- SETTINGS --------------------
+# Row-id arrays keyed on (dataset version, FilterSpec), shared by every page and session.
+ROW_CACHE = ByteLRU(int(os.environ.get("SLEEP_HEALTH_ROW_CACHE_MB", "64")) << 20, name="rows", sizeof=lambda rows: rows.nbytes)
+
+
+# -------------------- FILTER SPEC --------------------
+@dataclass(frozen=True)
+class FilterSpec:
+    """Canonical, hashable filter state shared by every page.
+
+    ``equals`` holds (column, values) pairs, both sorted, with empty
+    selections dropped (an empty multiselect means "no filter");
+    ``value_range`` is an inclusive (low, high) Age range and ``flags`` the
+    sorted precomputed flags. Two pages that filter the same rows build equal
+    specs, whatever order the user picked the values in.
+    """
+
+    equals: tuple = ()
+    value_range: tuple = None
+    flags: tuple = ()
+
+    @classmethod
+    def build(cls, equals=None, value_range=None, flags=()) -> "FilterSpec":
+        return cls(
+            equals=tuple(sorted((column, tuple(sorted(selected))) for column, selected in (equals or {}).items() if selected)),
+            value_range=None if value_range is None else (int(value_range[0]), int(value_range[1])),
+            flags=tuple(sorted(set(flags))),
+        )
+
+    def query(self) -> dict:
+        """Keyword arguments for BitmapIndex.select and the DataCube queries."""
+        return {"equals": {column: list(selected) for column, selected in self.equals}, "value_range": self.value_range, "flags": self.flags}
+
+    def parts(self) -> list:
+        """JSON-ready form for canonical_key()."""
+        return [[list(pair) for pair in self.equals], self.value_range, list(self.flags)]
+
+
+# -------------------- CACHED SELECTION --------------------
+def cached_select(index, spec: FilterSpec, version: str):
+    """Row ids matching spec, computed once per dataset version and shared read-only."""
+    def compute():
+        rows = index.select(**spec.query())
+        rows.flags.writeable = False
+        return rows
+    return ROW_CACHE.get_or_compute((version, spec), compute)
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pandas as pd
+
+from sleep_health.snapshot import CHUNK_ROWS, SnapshotWriter
+
+
+# -------------------- ROW ESTIMATE --------------------
+def _csv_row_estimate(path: Path) -> int:
+    """Line count minus the header: an upper bound on the records of a CSV export."""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _xlsx_row_estimate(path: Path) -> int:
+    """Rows declared by the sheet dimension, minus the header.
+
+    The dimension can be missing or wrong in third-party exports; it only
+    sizes the first allocation, since SnapshotWriter grows as rows arrive.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        declared = workbook.active.max_row or 0
+    finally:
+        workbook.close()
+    return max(declared - 1, 0)
+
+
+def row_estimate(path) -> int:
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return _csv_row_estimate(path)
+    return _xlsx_row_estimate(path)
+
+
+# -------------------- CHUNKED READERS --------------------
+def _iter_xlsx_rows(path: Path, header: list = None):
+    """Rows of the active sheet, however many its declared dimension claims.
+
+    The read-only reader stops at the declared last row, so the dimension is
+    reset first; rows then come back at their stored length and are padded
+    or cut to the header width.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return
+        names = [str(name).strip() if name is not None else "" for name in first]
+        if header is not None:
+            header.extend(names)
+        width = len(names)
+        for row in rows:
+            if any(value is not None for value in row):
+                yield (tuple(row) + (None,) * width)[:width]
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_chunks(path, chunk_rows: int = CHUNK_ROWS):
+    """Stream a workbook through openpyxl's read-only reader, chunk_rows at a time."""
+    header = []
+    buffer = []
+    for row in _iter_xlsx_rows(Path(path), header):
+        buffer.append(row)
+        if len(buffer) == chunk_rows:
+            yield pd.DataFrame(buffer, columns=header)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=header)
+
+
+def iter_csv_chunks(path, chunk_rows: int = CHUNK_ROWS):
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip()
+            yield chunk
+
+
+def iter_chunks(path, chunk_rows: int = CHUNK_ROWS):
+    if Path(path).suffix.lower() == ".csv":
+        return iter_csv_chunks(path, chunk_rows)
+    return iter_xlsx_chunks(path, chunk_rows)
+
+
+# -------------------- INGESTION --------------------
+def ingest(path, target, chunk_rows: int = CHUNK_ROWS, progress=None) -> Path:
+    """Stream an .xlsx / .csv export into a snapshot directory.
+
+    Rows flow chunk by chunk into the preallocated typed column files of a
+    SnapshotWriter, so peak memory is one chunk regardless of file size.
+    ``progress(done, total)`` is called after every chunk.
+    """
+    total = row_estimate(path)
+    writer = SnapshotWriter(target, total)
+    try:
+        if progress:
+            progress(0, total)
+        for chunk in iter_chunks(path, chunk_rows):
+            writer.append(chunk)
+            if progress:
+                progress(writer.filled, max(total, writer.filled))
+        return writer.close()
+    except BaseException:
+        writer.abort()
+        raise
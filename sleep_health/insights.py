@@ -0,0 +1,153 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from sleep_health.cube import FIRST_ROW
+
+# -------------------- TEMPLATES --------------------
+# Bound str.format methods: each template is parsed once, at import.
+BADGE = '<span style="background-color:{color}; color:black; padding:3px 8px; border-radius:8px; font-size:13px;">{text}</span>'.format
+NUMBER = '<span style="color:{color}; font-weight:bold;">{value}</span>{unit}'.format
+NOT_AVAILABLE = '<span style="color:gray;">N/A</span>'
+NO_DATA = '<span style="color:gray;">No data</span>'
+
+GENDER_DISORDER_LINE = "- Among <strong>{label}</strong>, the most common sleep condition is {badge}.<br>".format
+AGE_DISORDER_LINE = "- In the <strong>{label}</strong> age group, {badge} is most common.<br>".format
+STRESS_LINE = "&nbsp;&nbsp;&nbsp;&nbsp;Average stress level: {value}<br>".format
+HEART_RATE_GENDER_LINE = "- {label}: {value}<br>".format
+HEART_RATE_AGE_LINE = "- Age {label}: {value}<br>".format
+
+DISORDER_ORDER = ['Sleep Apnea', 'Insomnia', 'None']
+DISORDER_COLORS = {'Sleep Apnea': '#E6A1B3', 'Insomnia': '#E66A6A', 'None': '#D8BFD8'}
+
+# (upper bound, color) pairs: a value takes the color of the first bound it is below.
+STRESS_SCALE = ((5, "#668fd4"), (7, "#fa9850"), (np.inf, "#e4444e"))
+HEART_RATE_SCALE = ((60, "#668fd4"), (80, "#fa9850"), (np.inf, "#e4444e"))
+
+STRESS_AGE_BINS = ([0, 25, 40, 60, 100], ["<25", "25-40", "40-60", "60+"])
+HEART_RATE_AGE_BINS = ([0, 25, 40, 60], ["<25", "25–40", "40–60"])
+
+
+# -------------------- FORMATTING --------------------
+def badge(text, color="#FFD700") -> str:
+    return BADGE(text=text, color=color)
+
+
+def colored_number(value, scale=STRESS_SCALE, digits=2, unit="") -> str:
+    try:
+        val = float(value)
+    except (TypeError, ValueError):
+        return NOT_AVAILABLE
+    color = next((color for bound, color in scale if val < bound), scale[-1][1])
+    return NUMBER(color=color, value=f"{val:.{digits}f}", unit=unit)
+
+
+def colored_stress(value) -> str:
+    return colored_number(value)
+
+
+def colored_heart_rate(value) -> str:
+    return colored_number(value, HEART_RATE_SCALE, digits=1, unit=" bpm")
+
+
+def disorder_badge(disorder) -> str:
+    return badge(disorder, DISORDER_COLORS.get(disorder, '#ccc'))
+
+
+# -------------------- AGGREGATION --------------------
+def _age_groups(ages: pd.Series, bins) -> pd.Series:
+    edges, labels = bins
+    return pd.cut(ages, bins=edges, labels=labels)
+
+
+def _means(cells: pd.DataFrame, key: pd.Series, measure: str, observed=False) -> pd.Series:
+    summed = cells[[f"{measure}_sum", f"{measure}_n"]].groupby(key, observed=observed).sum()
+    return summed[f"{measure}_sum"] / summed[f"{measure}_n"].replace(0, np.nan)
+
+
+def _dominant(cells: pd.DataFrame, key: pd.Series, measure: str) -> tuple:
+    """(group, most common disorder, mean measure) per non-empty group.
+
+    Ties go to the disorder whose first row comes earliest, the one
+    value_counts().idxmax() picks on the rows themselves.
+    """
+    by = [key, cells["Sleep Disorder"]]
+    ranked = pd.DataFrame({
+        "count": cells["count"].groupby(by, observed=True).sum(),
+        "first": cells[FIRST_ROW].groupby(by, observed=True).min(),
+    }).sort_values(["count", "first"], ascending=[False, True])
+    best = ranked[~ranked.index.get_level_values(0).duplicated()].sort_index(level=0)
+    means = _means(cells, key, measure)
+    return tuple((str(label), str(disorder), float(means[label])) for label, disorder in best.index)
+
+
+def stress_profile(cube, equals=None, value_range=None, flags=()) -> tuple:
+    """Dominant disorder and mean stress per Gender present and per Age Group.
+
+    Both breakdowns come from the matching cube cells, so the cost depends on
+    the number of occupied cells rather than on how many rows the filter selects.
+    """
+    cells = cube.cells[cube.cell_mask(equals, value_range, flags)]
+    if cells.empty:
+        return (), ()
+    by_gender = _dominant(cells, cells["Gender"], "Stress Level")
+    by_age = _dominant(cells, _age_groups(cells["Age"], STRESS_AGE_BINS), "Stress Level")
+    return by_gender, by_age
+
+
+def heart_rate_profile(cube, equals=None, value_range=None, flags=()) -> tuple:
+    """Mean heart rate per Gender present and per Age Group under 60.
+
+    Returns (rows, by_gender, by_age); age groups without rows have a None mean.
+    """
+    cells = cube.rollup(("Gender", "Age"), equals, value_range, flags)
+    rows = int(cells["count"].sum())
+    by_gender = _means(cells, cells["Gender"], "Heart Rate", observed=True)
+    under_60 = cells[cells["Age"] < 60]
+    by_age = _means(under_60, _age_groups(under_60["Age"], HEART_RATE_AGE_BINS), "Heart Rate")
+    known = bool(cells["Gender"].notna().any())
+    return rows, (_pairs(by_gender) if known else None), _pairs(by_age)
+
+
+def _pairs(means: pd.Series) -> tuple:
+    return tuple((str(label), None if pd.isna(mean) else float(mean)) for label, mean in means.items())
+
+
+# -------------------- HTML --------------------
+@lru_cache(maxsize=512)
+def stress_insight_html(by_gender: tuple, by_age: tuple) -> str:
+    """Page 3 demographic patterns, memoized on the aggregate values.
+
+    The gender section is left out when no rows match; the age header is always shown.
+    """
+    parts = ["<strong>🔸Gender-Based Observations</strong><br><br>"] if by_gender else []
+    for label, disorder, stress in by_gender:
+        parts.append(GENDER_DISORDER_LINE(label=label, badge=disorder_badge(disorder)))
+        if stress:
+            parts.append(STRESS_LINE(value=colored_stress(stress)))
+    parts.append("<br><strong>🔸Age Group Insights</strong><br><br>")
+    for label, disorder, stress in by_age:
+        parts.append(AGE_DISORDER_LINE(label=label, badge=disorder_badge(disorder)))
+        if stress:
+            parts.append(STRESS_LINE(value=colored_stress(stress)))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=512)
+def heart_rate_insight_html(rows: int, by_gender, by_age: tuple) -> str:
+    """Page 4 demographic patterns, memoized on the aggregate values."""
+    if not rows:
+        return "⚠️ <em>No demographic data available based on current filters.</em>"
+    if by_gender is None:
+        parts = ["⚠️ Gender data is not available.<br>"]
+    else:
+        parts = ["<strong>🔸 Average Heart Rate by Gender:</strong><br>"]
+        parts += [HEART_RATE_GENDER_LINE(label=label, value=_heart_rate_or_gap(hr)) for label, hr in by_gender]
+    parts.append("<br><strong>🔸 Heart Rate by Age Group:</strong><br>")
+    parts += [HEART_RATE_AGE_LINE(label=label, value=_heart_rate_or_gap(hr)) for label, hr in by_age]
+    return "".join(parts)
+
+
+def _heart_rate_or_gap(hr) -> str:
+    return NO_DATA if hr is None else colored_heart_rate(hr)
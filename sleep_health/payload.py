@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import re
+import threading
+from collections import defaultdict, deque
+from pathlib import Path
+
+import numpy as np
+
+# -------------------- SETTINGS --------------------
+# Budgets in KB of serialized ForwardMsg bytes; elements or reruns above them are flagged.
+ELEMENT_BUDGET = int(os.environ.get("SLEEP_HEALTH_ELEMENT_BUDGET_KB", "64")) << 10
+RERUN_BUDGET = int(os.environ.get("SLEEP_HEALTH_RERUN_BUDGET_KB", "512")) << 10
+# Sizes kept per (page, element) for the breakdown.
+WINDOW = 500
+HINT_CHARS = 40
+
+_history = defaultdict(lambda: deque(maxlen=WINDOW))
+_history_lock = threading.Lock()
+
+
+# -------------------- MESSAGES --------------------
+def describe(msg) -> tuple:
+    """(kind, label) of a ForwardMsg: the element type and a short, rerun-stable label."""
+    kind = msg.WhichOneof("type")
+    if kind == "ref_hash":
+        return "cached_ref", "cached_ref"
+    if kind != "delta":
+        return kind, kind
+    path = ".".join(map(str, msg.metadata.delta_path))
+    delta_kind = msg.delta.WhichOneof("type")
+    if delta_kind != "new_element":
+        return delta_kind, f"{delta_kind} @{path}"
+    element = msg.delta.new_element
+    kind = element.WhichOneof("type")
+    hint = ""
+    if kind == "markdown":
+        hint = re.sub(r"\s+", " ", element.markdown.body).strip()[:HINT_CHARS]
+    elif kind == "component_instance":
+        hint = element.component_instance.component_name
+    elif kind == "heading":
+        hint = element.heading.body[:HINT_CHARS]
+    return kind, f"{kind} @{path}" + (f" {hint}" if hint else "")
+
+
+class PayloadMeter:
+    """Serialized bytes of every message one rerun sends to the browser."""
+
+    def __init__(self):
+        self.elements = []
+        self._lock = threading.Lock()
+
+    def add(self, msg):
+        kind, label = describe(msg)
+        size = msg.ByteSize()
+        with self._lock:
+            self.elements.append({"kind": kind, "label": label, "bytes": size})
+
+    @property
+    def total(self) -> int:
+        return sum(item["bytes"] for item in self.elements)
+
+    def over_budget(self) -> list:
+        return [item for item in self.elements if item["bytes"] > ELEMENT_BUDGET]
+
+    def summary(self) -> dict:
+        """JSON-ready totals for the trace log."""
+        by_kind = defaultdict(int)
+        for item in self.elements:
+            by_kind[item["kind"]] += item["bytes"]
+        return {
+            "total_bytes": self.total,
+            "over_rerun_budget": self.total > RERUN_BUDGET,
+            "over_budget": [item["label"] for item in self.over_budget()],
+            "by_kind": dict(sorted(by_kind.items(), key=lambda kv: kv[1], reverse=True)),
+            "elements": self.elements,
+        }
+
+
+# -------------------- ATTACHING --------------------
+def _metered(ctx):
+    send = ctx._enqueue
+
+    def enqueue(msg):
+        meter = getattr(ctx, "_payload_meter", None)
+        if meter is not None:
+            meter.add(msg)
+        send(msg)
+    return enqueue
+
+
+def watch():
+    """Meter the messages the current script run enqueues; None outside a Streamlit run.
+
+    The script run context is reused across reruns of a session, so its
+    enqueue function is wrapped once and each rerun swaps in a fresh meter.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    if not getattr(ctx, "_payload_wrapped", False):
+        ctx._enqueue = _metered(ctx)
+        ctx._payload_wrapped = True
+    ctx._payload_meter = PayloadMeter()
+    return ctx._payload_meter
+
+
+def stop(page: str, meter):
+    """Detach the meter from its run and add its sizes to the page history."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is not None and getattr(ctx, "_payload_meter", None) is meter:
+        ctx._payload_meter = None
+    record(page, meter.elements, meter.total)
+
+
+def record(page: str, elements: list, total: int):
+    with _history_lock:
+        _history[(page, "rerun total", "")].append(total)
+        for item in elements:
+            _history[(page, item["label"], item["kind"])].append(item["bytes"])
+
+
+# -------------------- BREAKDOWN --------------------
+def breakdown(page: str) -> list:
+    """Per-element payload of a page (KB), largest p95 first; flags elements over budget."""
+    with _history_lock:
+        series = {(label, kind): list(sizes) for (owner, label, kind), sizes in _history.items() if owner == page}
+    rows = []
+    for (label, kind), sizes in series.items():
+        budget = RERUN_BUDGET if label == "rerun total" else ELEMENT_BUDGET
+        p50, p95 = np.percentile(sizes, [50, 95])
+        rows.append({
+            "element": label,
+            "kind": kind,
+            "reruns": len(sizes),
+            "last KB": round(sizes[-1] / 1024, 1),
+            "p50 KB": round(p50 / 1024, 1),
+            "p95 KB": round(p95 / 1024, 1),
+            "over budget": bool(p95 > budget),
+        })
+    return sorted(rows, key=lambda row: row["p95 KB"], reverse=True)
+
+
+# -------------------- CLI --------------------
+def main():
+    from sleep_health.tracing import TRACE_LOG
+
+    parser = argparse.ArgumentParser(description="Per-page payload breakdown from the rerun trace log.")
+    parser.add_argument("log", nargs="?", default=TRACE_LOG)
+    parser.add_argument("--top", type=int, default=10, help="elements shown per page")
+    args = parser.parse_args()
+    pages = set()
+    with open(Path(args.log), encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "payload" in entry:
+                pages.add(entry["page"])
+                record(entry["page"], entry["payload"]["elements"], entry["payload"]["total_bytes"])
+    print(f"Budgets: {ELEMENT_BUDGET >> 10} KB per element, {RERUN_BUDGET >> 10} KB per rerun")
+    for page in sorted(pages):
+        print(f"\n{page}")
+        for row in breakdown(page)[:args.top]:
+            flag = "  OVER BUDGET" if row["over budget"] else ""
+            print(f"  {row['p95 KB']:>9.1f} KB p95  {row['last KB']:>9.1f} KB last  {row['element']}{flag}")
+
+
+if __name__ == "__main__":
+    main()
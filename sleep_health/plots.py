@@ -0,0 +1,107 @@
+import json
+import os
+
+from sleep_health.cache import ByteLRU, canonical_key
+from sleep_health.startup import load
+from sleep_health.tracing import traced
+
+# -------------------- CONSTANTS --------------------
+HEART_RATE_COLORS = {'Female': '#E66A6A', 'Male': '#A7C7E7'}
+SLEEP_QUALITY_ORDER = ['4', '5', '6', '7', '8', '9']
+SLEEP_QUALITY_COLORS = {
+    '4': '#F7D794', '5': '#A7C7E7', '6': '#E6A1B3',
+    '7': '#E66A6A', '8': '#FF7F00', '9': '#5E548E'
+}
+FONT = dict(family="Merriweather, serif", size=12)
+
+# Finished plotly figure JSON keyed on the filter state, shared by every session.
+PLOTLY_CACHE = ByteLRU(int(os.environ.get("SLEEP_HEALTH_PLOTLY_CACHE_MB", "16")) << 20, name="plotly")
+
+
+# -------------------- FIGURES --------------------
+@traced()
+def heart_rate_line(cube, spec):
+    """Average heart rate by age, one line per gender."""
+    age_range = spec.value_range
+    grouped = cube.rollup(['Age', 'Gender'], **spec.query())
+    grouped = grouped[['Age', 'Gender', 'Heart Rate_mean']].rename(columns={'Heart Rate_mean': 'Heart Rate'})
+    px = load("plotly.express")
+    fig = px.line(
+        grouped,
+        x="Age",
+        y="Heart Rate",
+        color="Gender",
+        color_discrete_map=HEART_RATE_COLORS,
+        markers=True,
+        title=(f" Average Heart Rate Trends by Gender (Ages {age_range[0]}–{age_range[1]})"),
+        labels={"Heart Rate": "Average Heart Rate"},
+        custom_data=["Gender"]
+    )
+    fig.update_traces(
+        hovertemplate='<b>Age: %{x}</b><br>Avg HR: %{y:.1f}<br>Gender: %{customdata[0]}<extra></extra>',
+        line=dict(width=2)
+    )
+    fig.update_layout(
+        legend_title_text='Gender',
+        height=400,
+        margin=dict(l=10, r=10, t=40, b=20),
+        font=FONT,
+        title_font_family="Merriweather, serif",
+        title_font_size=24
+    )
+    return fig
+
+
+@traced()
+def sleep_quality_bar(cube, occupation, spec):
+    """Sleep quality counts per occupation, or None when the filters leave no rows."""
+    query = spec.query()
+    if occupation != 'All':
+        query["equals"]["Occupation"] = [occupation]
+    counts = cube.rollup(['Occupation', 'Quality of Sleep'], **query)
+    if counts.empty:
+        return None
+    counts = counts[['Occupation', 'Quality of Sleep', 'count']].rename(columns={'count': 'Count'})
+    counts['Quality of Sleep'] = counts['Quality of Sleep'].astype(str)
+    px = load("plotly.express")
+    fig = px.bar(
+        counts,
+        x='Occupation',
+        y='Count',
+        color='Quality of Sleep',
+        barmode='group',
+        title=" Distribution of Sleep Quality Across Occupations" + ("" if occupation == 'All' else f" – {occupation}"),
+        labels={'Quality of Sleep': 'Sleep Quality', 'Occupation': 'Occupation'},
+        category_orders={'Quality of Sleep': SLEEP_QUALITY_ORDER},
+        color_discrete_map=SLEEP_QUALITY_COLORS
+    )
+    fig.update_layout(
+        xaxis_tickangle=0,
+        xaxis_title="Occupation",
+        yaxis_title="Count",
+        font=FONT,
+        title_font_family="Merriweather, serif",
+        title_font_size=24,
+        height=400
+    )
+    return fig
+
+
+# -------------------- CACHED FIGURES --------------------
+def plot_key(chart: str, spec, occupation, version) -> str:
+    """Canonical key of one chart's inputs; pass occupation=None for charts it does not affect."""
+    return canonical_key(chart, spec.parts(), occupation, version)
+
+
+def cached_figure(key: str, build):
+    """Figure for key, rebuilt from cached JSON when possible; None when build() returned None.
+
+    The JSON was produced from a validated figure, so it is loaded without
+    running plotly's validators again. plotly itself is imported on first use.
+    """
+    spec = PLOTLY_CACHE.get_or_compute(key, lambda: _to_json(build()))
+    return None if spec is None else load("plotly.graph_objects").Figure(json.loads(spec), _validate=False)
+
+
+def _to_json(fig):
+    return None if fig is None else fig.to_json()
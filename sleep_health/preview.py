@@ -0,0 +1,61 @@
+import math
+
+import streamlit as st
+
+from sleep_health.store import load_sort_order
+from sleep_health.tracing import fragment_run, span
+
+# -------------------- SETTINGS --------------------
+PAGE_SIZES = (25, 50, 100, 250)
+DEFAULT_PAGE_SIZE = 50
+NO_SORT = "(row order)"
+
+
+# -------------------- PAGINATED PREVIEW --------------------
+def _clamp(key: str, low: int, high: int):
+    """Keep a stored page number inside the page range before its widget is drawn."""
+    if key in st.session_state:
+        st.session_state[key] = min(max(st.session_state[key], low), high)
+
+
+@st.fragment
+def paginated_preview(view, key: str, labels=None, columns=None):
+    """Sortable, paginated table over a FrameView; only the visible page is materialized.
+
+    ``labels`` maps column names to display names and ``columns`` limits the
+    columns offered. The row count comes from the view's row ids, so nothing
+    is built for rows that are not shown. Widget keys are prefixed with ``key``.
+    Runs as a fragment: paging and sorting rerun only the table.
+    """
+    with fragment_run(f"Preview · {key}"):
+        _preview(view, key, labels, columns)
+
+
+def _preview(view, key, labels, columns):
+    labels = labels or {}
+    available = list(columns or view.base.columns)
+    label = lambda name: labels.get(name, name)
+
+    shown = st.multiselect("Columns", available, default=available, format_func=label, key=f"{key}_columns")
+    sort_col, order_col, size_col, page_col = st.columns(4)
+    with sort_col:
+        sort_by = st.selectbox("Sort by", [NO_SORT] + shown, format_func=label, key=f"{key}_sort")
+    with order_col:
+        descending = st.toggle("Descending", key=f"{key}_descending", disabled=sort_by == NO_SORT)
+    with size_col:
+        size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{key}_size")
+    pages = max(1, math.ceil(len(view) / size))
+    with page_col:
+        _clamp(f"{key}_page", 1, pages)
+        number = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    with span("preview_page"):
+        if sort_by != NO_SORT:
+            order = load_sort_order(sort_by, not descending) if view.dense else None
+            view = view.sort(sort_by, not descending, order)
+        visible = view.page(number - 1, size)
+        table = visible.materialize(shown).rename(columns=labels)
+        table.index = range((number - 1) * size + 1, (number - 1) * size + len(table) + 1)
+    first = (number - 1) * size + 1 if len(view) else 0
+    st.caption(f"Rows {first:,}–{(number - 1) * size + len(table):,} of {len(view):,}")
+    st.dataframe(table, use_container_width=True)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+# -------------------- DECLARED SCHEMA --------------------
+CATEGORY = "category"
+STRING = "string"
+BLOOD_PRESSURE = "blood_pressure"
+
+SCHEMA = {
+    "Person ID": "int32",
+    "Name": STRING,
+    "Nationality": CATEGORY,
+    "Gender": CATEGORY,
+    "Age": "int8",
+    "Occupation": CATEGORY,
+    "Sleep Duration": "float32",
+    "Quality of Sleep": "int8",
+    "Physical Activity Level": "int8",
+    "Stress Level": "int8",
+    "BMI Category": CATEGORY,
+    "Blood Pressure": BLOOD_PRESSURE,
+    "Heart Rate": "int16",
+    "Daily Steps": "uint16",
+    "Sleep Disorder": CATEGORY,
+}
+
+# Missing categorical values that carry a meaning of their own.
+CATEGORY_FILL = {"Sleep Disorder": "None"}
+
+# "120/80" is stored as two small unsigned columns.
+BP_COLUMNS = ("Systolic BP", "Diastolic BP")
+BP_DTYPE = "uint8"
+
+
+# -------------------- CASTING --------------------
+def gap_dtype(dtype) -> np.dtype:
+    """Float dtype that holds every value of an integer dtype, for columns with blank cells."""
+    return np.dtype(np.float32 if np.dtype(dtype).itemsize <= 2 else np.float64)
+
+
+def _checked_int(name, values, dtype):
+    """Values in the declared integer dtype; blank cells turn the column into floats with NaN."""
+    values = pd.to_numeric(pd.Series(values), errors="raise")
+    present = values.dropna()
+    info = np.iinfo(dtype)
+    if len(present) and (present.min() < info.min or present.max() > info.max):
+        raise ValueError(
+            f"Column '{name}' spans {present.min()}..{present.max()}, outside the {dtype} range"
+        )
+    if len(present) < len(values):
+        return values.to_numpy(dtype=gap_dtype(dtype))
+    return values.to_numpy().astype(dtype)
+
+
+def _split_blood_pressure(series):
+    blank = series.isna()
+    parts = series.astype(str).str.split("/", n=1, expand=True)
+    if parts.shape[1] != 2:
+        parts = parts.reindex(columns=[0, 1])
+    parts.loc[blank] = None
+    if parts[~blank].isna().any().any():
+        raise ValueError("Column 'Blood Pressure' must be formatted as 'systolic/diastolic'")
+    return {
+        BP_COLUMNS[0]: _checked_int(BP_COLUMNS[0], parts[0], BP_DTYPE),
+        BP_COLUMNS[1]: _checked_int(BP_COLUMNS[1], parts[1], BP_DTYPE),
+    }
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the compact frame: categoricals, downcast numerics and split blood pressure."""
+    missing = [name for name in SCHEMA if name not in df.columns]
+    if missing:
+        raise ValueError(f"Dataset is missing expected columns: {missing}")
+    columns = {}
+    for name, kind in SCHEMA.items():
+        series = df[name]
+        if kind == CATEGORY:
+            if name in CATEGORY_FILL:
+                series = series.fillna(CATEGORY_FILL[name])
+            columns[name] = pd.Categorical(series.astype(object))
+        elif kind == STRING:
+            columns[name] = series.astype("string")
+        elif kind == BLOOD_PRESSURE:
+            columns.update(_split_blood_pressure(series))
+        elif kind.startswith("float"):
+            columns[name] = series.to_numpy(dtype=kind)
+        else:
+            columns[name] = _checked_int(name, series, kind)
+    return pd.DataFrame(columns)
+
+
+# -------------------- MEMORY REPORT --------------------
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Bytes per row for each column of the raw and the compact frame."""
+    rows = max(len(before), 1)
+    order = list(dict.fromkeys([*before.columns, *after.columns]))
+    report = pd.DataFrame({
+        "before (bytes/row)": before.memory_usage(index=False, deep=True) / rows,
+        "after (bytes/row)": after.memory_usage(index=False, deep=True) / rows,
+    }).reindex(order).fillna(0)
+    report.loc["Total"] = report.sum()
+    report["saving"] = 1 - report["after (bytes/row)"] / report["before (bytes/row)"].replace(0, np.nan)
+    return report
+
+
+def main():
+    from sleep_health.snapshot import DATASET_PATH
+
+    raw = pd.read_excel(DATASET_PATH)
+    with pd.option_context("display.float_format", "{:.2f}".format):
+        print(memory_report(raw, apply_schema(raw)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import urllib.request
+import zlib
+
+from sleep_health.animations import ANIMATIONS, load_lottie
+from sleep_health.assets import build_all
+from sleep_health.bitmap import BitmapIndex
+from sleep_health.cube import DataCube
+from sleep_health.snapshot import ROOT, load_dataset, snapshot_path
+
+# -------------------- LAYOUT --------------------
+# python -m sleep_health.serve --workers 4 --port 8501
+#
+# The snapshot and its bitmap/cube indexes are built once before any worker
+# starts; every worker then memory-maps the same read-only column files, so
+# extra workers add CPU (one GIL each) without another copy of the data.
+# With --warmup each worker also fills its in-process caches before its
+# health check turns 200, and the balancer only routes to healthy workers.
+APP = ROOT / "Welcome_to_our_project ⭐💫.py"
+HEALTH_PATH = "/_stcore/health"
+HEALTH_INTERVAL = 2.0
+BUFFER_BYTES = 1 << 16
+# Holds a browser's routing key; set on the first response it gets without one.
+STICKY_COOKIE = "sleep_health_worker"
+
+
+# -------------------- PREPARATION --------------------
+def prepare():
+    """Build the snapshot, its indexes, the static images and the minified animations so workers only ever read them."""
+    frame = load_dataset()
+    target = snapshot_path()
+    BitmapIndex.open(target, lambda: frame)
+    DataCube.open(target, lambda: frame)
+    build_all()
+    for name in ANIMATIONS:
+        load_lottie(name)
+    return target
+
+
+# -------------------- WORKERS --------------------
+class Worker:
+    def __init__(self, port: int, extra_args=(), preload=False, warmup=False):
+        self.port = port
+        self.extra_args = list(extra_args)
+        self.preload = preload
+        self.warmup = warmup
+        self.process = None
+        self.healthy = False
+
+    def start(self):
+        # sleep_health.startup run = streamlit run with the heavy page imports
+        # started in a background thread as the process boots;
+        # sleep_health.warmup run also warms the data and default views.
+        if self.warmup:
+            launcher = "sleep_health.warmup"
+        elif self.preload:
+            launcher = "sleep_health.startup"
+        else:
+            launcher = "streamlit"
+        command = [
+            sys.executable, "-m", launcher, "run", str(APP),
+            "--server.port", str(self.port),
+            "--server.address", "127.0.0.1",
+            "--server.headless", "true",
+            *self.extra_args,
+        ]
+        self.process = subprocess.Popen(command, cwd=ROOT, env=os.environ.copy())
+        self.healthy = False
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def check(self) -> bool:
+        """Poll the worker's health endpoint; a warming worker answers 503 and stays out of rotation."""
+        was_healthy = self.healthy
+        url = f"http://127.0.0.1:{self.port}{HEALTH_PATH}"
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                self.healthy = response.status == 200
+        except OSError:
+            self.healthy = False
+        if self.healthy and not was_healthy:
+            print(f"Worker on port {self.port} is ready", flush=True)
+        return self.healthy
+
+    def stop(self):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+# -------------------- LOAD BALANCER --------------------
+class Balancer:
+    """Sticky proxy: a browser always lands on the same worker while that worker is up.
+
+    Streamlit keeps session state in the worker that owns the websocket, so
+    connections are routed by a sticky key (see sticky_key) rather than
+    round-robin. Keys hash over the full worker list and step to the next
+    healthy worker only when theirs is down, so a worker leaving or rejoining
+    moves no other sessions. Until some worker is ready every connection gets
+    a 503, so an upstream load balancer probing /_stcore/health on this port
+    holds traffic until at least one worker is warm.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+
+    def pick(self, key: str):
+        start = zlib.crc32(key.encode()) % len(self.workers)
+        for step in range(len(self.workers)):
+            worker = self.workers[(start + step) % len(self.workers)]
+            if worker.healthy:
+                return worker
+        return None
+
+    async def _pipe(self, reader, writer):
+        try:
+            while data := await reader.read(BUFFER_BYTES):
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            request = await client_reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+        key, new = sticky_key(request)
+        worker = self.pick(key)
+        if worker is None:
+            client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await client_writer.drain()
+            client_writer.close()
+            return
+        upstream_writer = None
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", worker.port)
+            upstream_writer.write(request)
+            await upstream_writer.drain()
+            if new:
+                response = await upstream_reader.readuntil(b"\r\n\r\n")
+                cookie = f"Set-Cookie: {STICKY_COOKIE}={key}; Path=/; HttpOnly; SameSite=Lax\r\n\r\n"
+                client_writer.write(response[:-2] + cookie.encode())
+                await client_writer.drain()
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            worker.healthy = False
+            if upstream_writer is not None:
+                upstream_writer.close()
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._pipe(client_reader, upstream_writer),
+            self._pipe(upstream_reader, client_writer),
+        )
+
+    async def supervise(self):
+        """Poll worker health and restart any worker whose process exited."""
+        while True:
+            for worker in self.workers:
+                if not worker.alive():
+                    print(f"Worker on port {worker.port} exited; restarting", flush=True)
+                    worker.start()
+                await asyncio.to_thread(worker.check)
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+
+def sticky_key(request: bytes) -> tuple:
+    """(routing key, whether the response must set the cookie) for a request head.
+
+    The key is the STICKY_COOKIE value, else a hash of the first
+    X-Forwarded-For address, else a fresh random key. The peer address is
+    never used: behind an upstream load balancer it is the same for everyone.
+    """
+    forwarded = None
+    for line in request.decode("latin-1").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        name = name.strip().lower()
+        if name == "cookie":
+            for part in value.split(";"):
+                cookie, _, key = part.strip().partition("=")
+                if cookie == STICKY_COOKIE and key:
+                    return key, False
+        elif name == "x-forwarded-for" and forwarded is None:
+            forwarded = value.split(",")[0].strip() or None
+    if forwarded:
+        return hashlib.blake2s(forwarded.encode(), digest_size=8).hexdigest(), True
+    return secrets.token_hex(8), True
+
+
+async def run(workers, host: str, port: int):
+    balancer = Balancer(workers)
+    server = await asyncio.start_server(balancer.handle, host, port)
+    print(f"Serving {len(workers)} workers on http://{host}:{port}", flush=True)
+    async with server:
+        await asyncio.gather(server.serve_forever(), balancer.supervise())
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app from several worker processes behind one port.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--worker-port", type=int, default=8600, help="first internal worker port")
+    parser.add_argument("--preload", action="store_true", help="import plotly/matplotlib/lottie in each worker at boot")
+    parser.add_argument("--warmup", action="store_true", help="warm each worker's data, assets and default views before it takes traffic")
+    args, streamlit_args = parser.parse_known_args()
+
+    print(f"Preparing snapshot and indexes in {prepare()}", flush=True)
+    workers = [Worker(args.worker_port + i, streamlit_args, args.preload, args.warmup) for i in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(run(workers, args.host, args.port))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for worker in workers:
+            worker.stop()
+
+
+if __name__ == "__main__":
+    main()
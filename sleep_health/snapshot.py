@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sleep_health import text
+from sleep_health.schema import apply_schema
+
+# -------------------- PATHS --------------------
+ROOT = Path(__file__).resolve().parent.parent
+SNAPSHOT_DIR = ROOT / ".cache" / "snapshots"
+
+# SLEEP_HEALTH_DATASET points the app at another .xlsx / .csv export or at a
+# ready-made snapshot directory (e.g. one written by sleep_health.synth).
+DATASET_PATH = Path(os.environ.get("SLEEP_HEALTH_DATASET", ROOT / "Sleep Health Lifestyle Dataset.xlsx"))
+
+# Bump when the on-disk layout changes so stale snapshots are rebuilt.
+FORMAT_VERSION = 6
+
+CHUNK_ROWS = 100_000
+# First allocation of a free-text column's byte buffer, per estimated row.
+TEXT_BYTES_PER_ROW = 16
+
+_digests = {}
+
+
+# -------------------- CONTENT HASH --------------------
+def file_digest(path=DATASET_PATH) -> str:
+    """SHA-256 of the file contents, memoized on (path, size, mtime)."""
+    path = Path(path)
+    stat = path.stat()
+    stamp = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if stamp not in _digests:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        _digests[stamp] = sha.hexdigest()
+    return _digests[stamp]
+
+
+def is_snapshot(path) -> bool:
+    return (Path(path) / "meta.json").is_file()
+
+
+def dataset_version(path=DATASET_PATH) -> str:
+    path = Path(path)
+    digest = file_digest(path / "meta.json" if is_snapshot(path) else path)
+    return f"{digest[:16]}-v{FORMAT_VERSION}"
+
+
+def snapshot_path(path=DATASET_PATH) -> Path:
+    if is_snapshot(path):
+        return Path(path)
+    return SNAPSHOT_DIR / dataset_version(path)
+
+
+# -------------------- WRITE --------------------
+class SnapshotWriter:
+    """Streams raw-schema chunks into preallocated per-column .npy files.
+
+    Each chunk goes through apply_schema; categorical codes are remapped onto
+    one dictionary per column that grows across chunks, and at close() the
+    category lists are sorted and the codes shrunk to the smallest dtype.
+    Free-text columns are not dictionary-encoded: their UTF-8 bytes are
+    appended to a byte buffer file next to per-row end offsets (see text.py).
+    Integer columns are widened to float if a chunk has blank cells in them.
+    ``rows`` is only an estimate: the column files grow when more rows
+    arrive and unused capacity is trimmed at close().
+    Nothing but the current chunk is ever held in memory.
+    """
+
+    def __init__(self, target, rows: int):
+        self.target = Path(target)
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.target.parent))
+        os.chmod(self.tmp, 0o755)
+        self.rows = max(rows, 1)
+        self.filled = 0
+        self.columns = None
+        self.buffers = {}
+        self.dictionaries = {}
+        self.text_bytes = {}
+
+    def _open(self, compact: pd.DataFrame):
+        self.columns = []
+        for i, name in enumerate(compact.columns):
+            series = compact[name]
+            entry = {"name": name, "file": f"{i:03d}.npy"}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                entry["kind"], dtype = "category", np.int16
+                self.dictionaries[name] = {}
+            elif pd.api.types.is_numeric_dtype(series):
+                entry["kind"], dtype = "numeric", series.dtype
+            else:
+                entry["kind"], dtype = "text", np.int64
+                entry["data"] = f"{i:03d}-data.npy"
+                self.buffers[entry["data"]] = np.lib.format.open_memmap(
+                    self.tmp / entry["data"], mode="w+", dtype=np.uint8, shape=(self.rows * TEXT_BYTES_PER_ROW,)
+                )
+                self.text_bytes[name] = 0
+            self.buffers[name] = np.lib.format.open_memmap(
+                self.tmp / entry["file"], mode="w+", dtype=dtype, shape=(self.rows,)
+            )
+            self.columns.append(entry)
+
+    def _encode(self, name, series) -> np.ndarray:
+        dictionary = self.dictionaries[name]
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        mapping = np.array([dictionary.setdefault(str(v), len(dictionary)) for v in uniques] + [-1])
+        limit = np.iinfo(self.buffers[name].dtype).max
+        if len(dictionary) > limit:
+            raise ValueError(f"Column '{name}' has more than {limit} distinct values")
+        return mapping[codes]  # code -1 picks the trailing -1
+
+    def _append_text(self, entry, series) -> np.ndarray:
+        """Append a chunk's bytes to the column's buffer; returns the chunk's end offsets."""
+        ends, data = text.encode(series)
+        used, stop = self.text_bytes[entry["name"]], self.text_bytes[entry["name"]] + len(data)
+        if stop > len(self.buffers[entry["data"]]):
+            size = max(stop, 2 * len(self.buffers[entry["data"]]))
+            self.buffers[entry["data"]] = _copy_column(self.tmp / entry["data"], self.buffers.pop(entry["data"]), np.uint8, size, used)
+        self.buffers[entry["data"]][used:stop] = data
+        self.text_bytes[entry["name"]] = stop
+        return text.shift(ends, used)
+
+    def append(self, chunk: pd.DataFrame):
+        compact = apply_schema(chunk)
+        if self.columns is None:
+            self._open(compact)
+        stop = self.filled + len(compact)
+        if stop > self.rows:
+            self._grow(stop)
+        for entry in self.columns:
+            series = compact[entry["name"]]
+            if entry["kind"] == "numeric":
+                values = series.to_numpy()
+                if values.dtype.kind == "f" and self.buffers[entry["name"]].dtype.kind in "iu":
+                    self._widen(entry, values.dtype)
+            elif entry["kind"] == "text":
+                values = self._append_text(entry, series)
+            else:
+                values = self._encode(entry["name"], series)
+            self.buffers[entry["name"]][self.filled:stop] = values
+        self.filled = stop
+
+    def _grow(self, needed: int):
+        """Enlarge every column file (at least doubling it) when the row estimate was too low."""
+        self.rows = max(needed, 2 * self.rows)
+        for entry in self.columns:
+            self._reallocate(entry, self.buffers[entry["name"]].dtype)
+
+    def _widen(self, entry, dtype):
+        """Re-type an integer column as float once a chunk brings blank cells into it."""
+        self._reallocate(entry, dtype)
+
+    def _reallocate(self, entry, dtype):
+        """Move a column's filled values into a new writable file of ``dtype`` with room for ``rows``."""
+        path = self.tmp / entry["file"]
+        self.buffers[entry["name"]] = _copy_column(path, self.buffers.pop(entry["name"]), dtype, self.rows, self.filled)
+
+    def _rewrite(self, entry, dtype, convert=None):
+        """Copy the filled part of a column into a right-sized file, optionally converting it."""
+        _copy_column(self.tmp / entry["file"], self.buffers.pop(entry["name"]), dtype, self.filled, self.filled, convert)
+
+    def _finish_category(self, entry):
+        dictionary = self.dictionaries[entry["name"]]
+        labels = sorted(dictionary)
+        remap = np.empty(len(dictionary) + 1, dtype=np.int64)
+        remap[[dictionary[label] for label in labels]] = np.arange(len(labels))
+        remap[-1] = -1
+        dtype = np.int8 if len(labels) < np.iinfo(np.int8).max else np.int16
+        self._rewrite(entry, dtype, remap)
+        entry["categories"] = labels
+
+    def close(self) -> Path:
+        if self.columns is None:
+            raise ValueError("Snapshot received no rows")
+        for entry in self.columns:
+            if entry["kind"] == "category":
+                self._finish_category(entry)
+                continue
+            if entry["kind"] == "text":
+                used = self.text_bytes[entry["name"]]
+                _copy_column(self.tmp / entry["data"], self.buffers.pop(entry["data"]), np.uint8, used, used)
+            if self.filled < self.rows:
+                self._rewrite(entry, self.buffers[entry["name"]].dtype)
+        for buffer in self.buffers.values():
+            buffer.flush()
+        self.buffers.clear()
+        meta = {"format": FORMAT_VERSION, "rows": self.filled, "columns": self.columns}
+        return publish(self.tmp, self.target, meta)
+
+    def abort(self):
+        self.buffers.clear()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def _copy_column(path: Path, source, dtype, length: int, filled: int, convert=None):
+    """Replace the .npy at ``path`` with one of ``length`` items holding source[:filled], copied a chunk at a time.
+
+    Returns the new file mapped read-write.
+    """
+    out = np.lib.format.open_memmap(path.with_suffix(".tmp"), mode="w+", dtype=dtype, shape=(length,))
+    for start in range(0, filled, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, filled)
+        out[start:stop] = source[start:stop] if convert is None else convert[source[start:stop]]
+    out.flush()
+    del source, out
+    os.replace(path.with_suffix(".tmp"), path)
+    return np.lib.format.open_memmap(path, mode="r+")
+
+
+def publish(tmp: Path, target: Path, meta: dict) -> Path:
+    """Write meta.json and move a finished column directory into place atomically."""
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process finished the same directory first; keep theirs.
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def write_columns(target, frame: pd.DataFrame, **extra) -> Path:
+    """Store a small derived table (categorical and numeric columns) in snapshot layout.
+
+    Used for the precomputed indexes kept next to a snapshot; ``extra`` keys
+    are added to meta.json.
+    """
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=target.parent))
+    os.chmod(tmp, 0o755)
+    columns = []
+    for i, name in enumerate(frame.columns):
+        series = frame[name]
+        entry = {"name": name, "file": f"{i:03d}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["kind"], entry["categories"] = "category", [str(c) for c in series.cat.categories]
+            values = series.cat.codes.to_numpy()
+        else:
+            entry["kind"], values = "numeric", series.to_numpy()
+        np.save(tmp / entry["file"], values)
+        columns.append(entry)
+    meta = {"format": FORMAT_VERSION, "rows": len(frame), "columns": columns, **extra}
+    return publish(tmp, target, meta)
+
+
+# -------------------- READ --------------------
+def read_meta(target) -> dict:
+    return json.loads((Path(target) / "meta.json").read_text(encoding="utf-8"))
+
+
+def read_snapshot(target: Path) -> pd.DataFrame:
+    """Read-only frame over the snapshot's memory-mapped column files.
+
+    Every column is mapped read-only and handed to pandas without a copy (one
+    block per column), so all sessions of a server process share one frame
+    and all worker processes share the same OS page cache; filtered views
+    gather their own copies. Free-text columns stay encoded until rows are
+    gathered from them, so only the rows a page shows are decoded.
+    """
+    target = Path(target)
+    meta = read_meta(target)
+    data = {}
+    for entry in meta["columns"]:
+        values = np.load(target / entry["file"], mmap_mode="r")
+        if entry["kind"] == "category":
+            # Codes were range-checked by SnapshotWriter; validating here would copy them.
+            values = pd.Categorical.from_codes(values, entry["categories"], validate=False)
+        elif entry["kind"] == "text":
+            values = text.TextArray(values, np.load(target / entry["data"], mmap_mode="r"))
+        data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+# -------------------- PUBLIC LOADER --------------------
+def build_snapshot(path=DATASET_PATH, progress=None) -> Path:
+    from sleep_health.ingest import ingest
+
+    target = snapshot_path(path)
+    if not is_snapshot(target):
+        ingest(path, target, progress=progress)
+    return target
+
+
+def load_dataset(path=DATASET_PATH) -> pd.DataFrame:
+    """Load the schema-typed dataset through its columnar snapshot, building it on first use."""
+    return read_snapshot(build_snapshot(path))
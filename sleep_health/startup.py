@@ -0,0 +1,128 @@
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import threading
+import time
+from functools import lru_cache
+
+# -------------------- SETTINGS --------------------
+# Heavy third-party modules each page needs; everything else in the pages is
+# cheap once streamlit and pandas are loaded.
+PAGE_MODULES = {
+    "Homepage": ("streamlit_lottie", "streamlit_extras.let_it_rain"),
+    "Sleep Dataset Explorer": ("streamlit_lottie",),
+    "Sleep & Stress Risk Analysis": ("matplotlib.figure",),
+    "Work & Wellness Sleep Metrics": ("plotly.express", "plotly.graph_objects"),
+}
+# Modules already loaded by every page; reports measure the cost on top of them.
+BASELINE = ("streamlit", "pandas", "numpy")
+
+# Run in a fresh interpreter: import the baseline, then time each module in
+# turn; a later module is only charged for what the earlier ones did not load.
+_MEASURE = """
+import importlib, json, sys, time
+for name in {baseline!r}:
+    importlib.import_module(name)
+costs = []
+for name in {modules!r}:
+    before, started = len(sys.modules), time.perf_counter()
+    importlib.import_module(name)
+    costs.append({{"module": name, "ms": round((time.perf_counter() - started) * 1000, 1), "new modules": len(sys.modules) - before}})
+print(json.dumps(costs))
+"""
+
+_lock = threading.Lock()
+_loads = {}
+_preload_thread = None
+
+
+# -------------------- LAZY IMPORTS --------------------
+def load(name: str):
+    """Import a module on first use and record how long that first import took.
+
+    Always goes through import_module, which waits on the module's import
+    lock: a module another thread is still importing is already in
+    sys.modules but only partially initialized.
+    """
+    loaded = name in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    if loaded:
+        return module
+    with _lock:
+        _loads.setdefault(name, {
+            "ms": (time.perf_counter() - started) * 1000,
+            "by": threading.current_thread().name,
+        })
+    return module
+
+
+def preload(modules=None):
+    """Import the heavy modules in a daemon thread so no request has to wait for them."""
+    global _preload_thread
+    modules = modules or sorted({name for names in PAGE_MODULES.values() for name in names})
+    with _lock:
+        if _preload_thread is not None:
+            return _preload_thread
+        _preload_thread = threading.Thread(target=lambda: [load(name) for name in modules], name="preload", daemon=True)
+    _preload_thread.start()
+    return _preload_thread
+
+
+# -------------------- REPORTS --------------------
+def load_report(page: str) -> list:
+    """In-process first-import cost of a page's heavy modules, and which thread paid it."""
+    rows = []
+    for name in PAGE_MODULES.get(page, ()):
+        entry = _loads.get(name)
+        if entry is not None:
+            rows.append({"module": name, "first import ms": round(entry["ms"], 1), "imported by": entry["by"]})
+        elif name in sys.modules:
+            rows.append({"module": name, "first import ms": None, "imported by": "already loaded"})
+        else:
+            rows.append({"module": name, "first import ms": None, "imported by": "not yet"})
+    return rows
+
+
+@lru_cache(maxsize=16)
+def import_costs(modules: tuple) -> list:
+    """Cold import cost of each module in a fresh interpreter, on top of the baseline.
+
+    Like ``python -X importtime``, but one figure per module: wall time and
+    the number of modules it pulled in.
+    """
+    code = _MEASURE.format(baseline=BASELINE, modules=modules)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Report heavy imports per page, or run streamlit with them preloaded.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="print the cold import cost of each page's heavy modules")
+    run = sub.add_parser("run", help="start the preload thread, then `streamlit run` the given arguments")
+    run.add_argument("streamlit_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        for page, modules in PAGE_MODULES.items():
+            print(page)
+            for row in import_costs(modules):
+                print(f"  {row['ms']:>8.1f} ms  {row['new modules']:>5} modules  {row['module']}")
+        return
+    from streamlit.web import cli
+
+    preload()
+    sys.argv = ["streamlit", "run", *args.streamlit_args]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    # `python -m` runs this file as __main__, a second copy of the module;
+    # run the imported one so its state is what the pages see.
+    from sleep_health import startup
+
+    startup.main()
@@ -0,0 +1,90 @@
+import streamlit as st
+
+from sleep_health.bitmap import BitmapIndex
+from sleep_health.cube import AgePrefix, DataCube
+from sleep_health.filters import FilterSpec, cached_select
+from sleep_health.snapshot import build_snapshot, dataset_version, is_snapshot, load_dataset, snapshot_path
+from sleep_health.tracing import traced
+from sleep_health.views import sort_order
+
+
+# -------------------- CACHED ACCESS --------------------
+# One read-only frame per server process: cache_resource hands every session
+# the same object instead of unpickling a private copy on each rerun.
+@st.cache_resource(show_spinner=False)
+def _load_version(version: str):
+    return load_dataset()
+
+
+@st.cache_resource(show_spinner=False)
+def _index_version(version: str):
+    return BitmapIndex.open(snapshot_path(), lambda: _load_version(version))
+
+
+@st.cache_resource(show_spinner=False)
+def _cube_version(version: str):
+    return DataCube.open(snapshot_path(), lambda: _load_version(version))
+
+
+@st.cache_resource(show_spinner=False)
+def _age_prefix_version(version: str):
+    return AgePrefix(_cube_version(version))
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _sort_order_version(version: str, column: str, ascending: bool):
+    return sort_order(_load_version(version), column, ascending)
+
+
+def _ensure_snapshot():
+    """Stream a new or changed export into its snapshot, showing progress on the page."""
+    if is_snapshot(snapshot_path()):
+        return
+    bar = st.progress(0.0, text="Preparing dataset...")
+
+    def report(done, total):
+        bar.progress(min(done / total, 1.0) if total else 1.0, text=f"Preparing dataset... {done:,} / {total:,} rows")
+
+    build_snapshot(progress=report)
+    bar.empty()
+
+
+@traced()
+def load_data():
+    """Dataset shared by every page and session; the cache key follows the workbook's content hash.
+
+    The frame's buffers are write-protected: derive new frames instead of
+    assigning into it.
+    """
+    _ensure_snapshot()
+    return _load_version(dataset_version())
+
+
+@traced()
+def load_index() -> BitmapIndex:
+    """Bitmap filter index over the same dataset, memory-mapped from the snapshot directory."""
+    return _index_version(dataset_version())
+
+
+@traced()
+def load_cube() -> DataCube:
+    """Pre-aggregated cells for KPIs and chart counts, memory-mapped from the snapshot directory."""
+    return _cube_version(dataset_version())
+
+
+@traced()
+def load_age_prefix() -> AgePrefix:
+    """Per-age cumulative sums for age-range KPIs, derived once from the cube."""
+    return _age_prefix_version(dataset_version())
+
+
+@traced()
+def select_rows(spec: FilterSpec):
+    """Row ids matching a filter spec; equivalent filters on any page share one cached result."""
+    return cached_select(load_index(), spec, dataset_version())
+
+
+@traced()
+def load_sort_order(column: str, ascending: bool = True):
+    """Whole-dataset row order for one column, shared by every session's sorted previews."""
+    return _sort_order_version(dataset_version(), column, ascending)
@@ -0,0 +1,161 @@
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sleep_health.schema import SCHEMA
+from sleep_health.snapshot import CHUNK_ROWS, DATASET_PATH, SnapshotWriter
+
+# -------------------- MODEL LAYOUT --------------------
+# (Gender, Age, Occupation, Sleep Disorder) are resampled as observed tuples so
+# their joint distribution is kept exactly; every other column is drawn from its
+# empirical distribution conditioned on the parents listed here, in order.
+JOINT_COLUMNS = ("Gender", "Age", "Occupation", "Sleep Disorder")
+CONDITIONALS = (
+    ("Nationality", ()),
+    ("Stress Level", ("Sleep Disorder",)),
+    ("Quality of Sleep", ("Stress Level",)),
+    ("Sleep Duration", ("Quality of Sleep",)),
+    ("Heart Rate", ("Age Band", "Gender")),
+    ("Physical Activity Level", ("Occupation",)),
+    ("Daily Steps", ("Physical Activity Level",)),
+    ("BMI Category", ("Sleep Disorder",)),
+    ("Blood Pressure", ("BMI Category",)),
+    ("First Name", ("Gender",)),
+    ("Last Name", ()),
+)
+NO_DISORDER = "None"
+XLSX_MAX_ROWS = 1_048_575
+
+
+def read_source(path) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+def _age_band(age):
+    return (np.asarray(age) // 10) * 10
+
+
+# -------------------- SYNTHETIC MODEL --------------------
+class SyntheticModel:
+    """Empirical joint/conditional distributions learned from a raw-schema frame."""
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.copy()
+        df["Sleep Disorder"] = df["Sleep Disorder"].fillna(NO_DISORDER)
+        df["Age Band"] = _age_band(df["Age"])
+        names = df["Name"].astype(str).str.split(" ", n=1, expand=True)
+        df["First Name"], df["Last Name"] = names[0], names[1].fillna("")
+
+        joint = df.groupby(list(JOINT_COLUMNS), observed=True).size()
+        self.joint_keys = joint.index.to_frame(index=False)
+        self.joint_probs = (joint / joint.sum()).to_numpy()
+
+        self.conditionals = []
+        for child, parents in CONDITIONALS:
+            marginal = df[child].value_counts(normalize=True)
+            table = {}
+            if parents:
+                for key, group in df.groupby(list(parents), observed=True)[child]:
+                    counts = group.value_counts(normalize=True)
+                    table[key if isinstance(key, tuple) else (key,)] = (counts.index.to_numpy(), counts.to_numpy())
+            self.conditionals.append((child, parents, table, (marginal.index.to_numpy(), marginal.to_numpy())))
+
+    @classmethod
+    def from_path(cls, path=DATASET_PATH) -> "SyntheticModel":
+        return cls(read_source(path))
+
+    def sample(self, rng: np.random.Generator, rows: int, first_id: int = 1) -> pd.DataFrame:
+        """One raw-schema chunk with the workbook's columns and formatting."""
+        chunk = self.joint_keys.iloc[rng.choice(len(self.joint_keys), size=rows, p=self.joint_probs)]
+        chunk = chunk.reset_index(drop=True)
+        chunk["Age Band"] = _age_band(chunk["Age"])
+        for child, parents, table, (values, probs) in self.conditionals:
+            if not parents:
+                chunk[child] = rng.choice(values, size=rows, p=probs)
+                continue
+            out = np.empty(rows, dtype=values.dtype)
+            for key, positions in chunk.groupby(list(parents), observed=True).indices.items():
+                key_values, key_probs = table.get(key if isinstance(key, tuple) else (key,), (values, probs))
+                out[positions] = rng.choice(key_values, size=len(positions), p=key_probs)
+            chunk[child] = out
+
+        chunk["Person ID"] = np.arange(first_id, first_id + rows)
+        chunk["Name"] = (chunk["First Name"] + " " + chunk["Last Name"]).str.strip()
+        chunk["Sleep Disorder"] = chunk["Sleep Disorder"].where(chunk["Sleep Disorder"] != NO_DISORDER)
+        return chunk[list(SCHEMA)]
+
+
+def generate(model: SyntheticModel, rows: int, seed: int = 0, chunk_rows: int = CHUNK_ROWS):
+    """Yield raw-schema chunks; the output depends only on (seed, rows, chunk_rows)."""
+    chunks = -(-rows // chunk_rows)
+    for i, child_seed in enumerate(np.random.SeedSequence(seed).spawn(chunks)):
+        size = min(chunk_rows, rows - i * chunk_rows)
+        yield model.sample(np.random.default_rng(child_seed), size, first_id=i * chunk_rows + 1)
+
+
+# -------------------- WRITERS --------------------
+def write_csv(chunks, path):
+    path = Path(path)
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False, quoting=csv.QUOTE_MINIMAL)
+    return path
+
+
+def write_xlsx(chunks, path, rows: int):
+    from openpyxl import Workbook
+
+    if rows > XLSX_MAX_ROWS:
+        raise ValueError(f"An xlsx sheet holds at most {XLSX_MAX_ROWS:,} data rows; use csv or npy instead")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(SCHEMA))
+    for chunk in chunks:
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(path)
+    return Path(path)
+
+
+def write_npy(chunks, path, rows: int):
+    """Write a snapshot directory that the loader reads directly."""
+    writer = SnapshotWriter(path, rows)
+    try:
+        for chunk in chunks:
+            writer.append(chunk)
+        return writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Sleep Health dataset of any size.")
+    parser.add_argument("output", type=Path, help="target .csv / .xlsx file, or a directory for npy")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=("csv", "xlsx", "npy"), default=None,
+                        help="defaults to the output suffix, npy for directories")
+    parser.add_argument("--source", type=Path, default=DATASET_PATH, help="dataset to learn from")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    fmt = args.format or {".csv": "csv", ".xlsx": "xlsx"}.get(args.output.suffix.lower(), "npy")
+    model = SyntheticModel.from_path(args.source)
+    chunks = generate(model, args.rows, args.seed, args.chunk_rows)
+    if fmt == "csv":
+        out = write_csv(chunks, args.output)
+    elif fmt == "xlsx":
+        out = write_xlsx(chunks, args.output, args.rows)
+    else:
+        out = write_npy(chunks, args.output, args.rows)
+    print(f"Wrote {args.rows:,} rows to {out}")
+
+
+if __name__ == "__main__":
+    main()
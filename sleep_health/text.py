@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype
+
+
+# -------------------- LAYOUT --------------------
+# A free-text column is two flat arrays: the UTF-8 bytes of every value back to
+# back, and per row the offset where its value ends. Row i spans
+# data[end(i - 1):end(i)]. A missing value is empty and stores its end
+# bitwise-inverted, so a negative entry marks it without a separate mask.
+def encode(values) -> tuple:
+    """(ends, data) for a sequence of strings and missing values; ends count from the start of data."""
+    values = pd.array(values, dtype="string")
+    missing = np.asarray(values.isna())
+    encoded = [b"" if gap else value.encode() for value, gap in zip(values, missing)]
+    ends = np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+    ends[missing] = ~ends[missing]
+    return ends, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def shift(ends: np.ndarray, offset: int) -> np.ndarray:
+    """Ends of a chunk whose bytes are stored ``offset`` bytes into the buffer."""
+    return np.where(ends < 0, ends - offset, ends + offset)
+
+
+def _absolute(ends: np.ndarray) -> np.ndarray:
+    return np.where(ends < 0, ~ends, ends)
+
+
+# -------------------- ARRAY --------------------
+class TextDtype(ExtensionDtype):
+    name = "text"
+    type = str
+    na_value = pd.NA
+
+    @classmethod
+    def construct_array_type(cls):
+        return TextArray
+
+
+class TextArray(ExtensionArray):
+    """Read-only strings over (ends, data) arrays, typically memory-mapped.
+
+    Nothing is decoded up front: take() and indexing decode only the rows
+    asked for and hand back a regular pandas string array, so gathering a
+    page of a preview costs that page. Whole-column operations (sorting on
+    the column) decode every row for their duration.
+    """
+
+    def __init__(self, ends: np.ndarray, data: np.ndarray):
+        self._ends = ends
+        self._data = data
+
+    @property
+    def dtype(self) -> TextDtype:
+        return TextDtype()
+
+    @property
+    def nbytes(self) -> int:
+        return self._ends.nbytes + self._data.nbytes
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    # -------------------- DECODING --------------------
+    def _decode(self, rows) -> ExtensionArray:
+        rows = np.asarray(rows, dtype=np.int64)
+        ends = self._ends[rows]
+        starts = np.where(rows > 0, _absolute(self._ends[np.maximum(rows - 1, 0)]), 0)
+        data = self._data
+        values = [None if end < 0 else bytes(data[start:end]).decode() for start, end in zip(starts.tolist(), ends.tolist())]
+        return pd.array(values, dtype="string")
+
+    def __getitem__(self, item):
+        if pd.api.types.is_integer(item):
+            return self._decode([item if item >= 0 else len(self) + item])[0]
+        if isinstance(item, slice):
+            return self._decode(np.arange(len(self))[item])
+        item = pd.api.indexers.check_array_indexer(self, item)
+        if item.dtype == bool:
+            item = np.flatnonzero(item)
+        return self._decode(np.where(item < 0, item + len(self), item))
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.int64)
+        if not allow_fill:
+            return self[indices]
+        missing = indices == -1
+        values = self._decode(np.where(missing, 0, indices)) if len(self) else pd.array([None] * len(indices), dtype="string")
+        values[missing] = fill_value if fill_value is not None else pd.NA
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._decode(np.arange(len(self))), dtype=dtype or object)
+
+    # -------------------- EXTENSION ARRAY PROTOCOL --------------------
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        return cls(*encode(scalars))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls._from_sequence(np.concatenate([np.asarray(array) for array in to_concat]))
+
+    def isna(self) -> np.ndarray:
+        return np.asarray(self._ends) < 0
+
+    def copy(self) -> "TextArray":
+        # The arrays are never written to, so copies can share them.
+        return type(self)(self._ends, self._data)
+
+    def __eq__(self, other):
+        return self._decode(np.arange(len(self))) == other
+
+    def _values_for_argsort(self) -> np.ndarray:
+        return np.asarray(self)
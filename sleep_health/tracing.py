@@ -0,0 +1,236 @@
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from sleep_health import animations, payload, startup
+from sleep_health.cache import cache_stats
+from sleep_health.snapshot import ROOT
+
+# -------------------- SETTINGS --------------------
+# One JSON line per rerun; set SLEEP_HEALTH_TRACE_LOG="" to turn the log off.
+TRACE_LOG = os.environ.get("SLEEP_HEALTH_TRACE_LOG", str(ROOT / ".cache" / "trace.jsonl"))
+# Durations kept per (page, stage) for the percentiles in the panel.
+WINDOW = 500
+# The sidebar panel is opt-in: ?diagnostics=1 in the URL or SLEEP_HEALTH_DIAGNOSTICS=1.
+DIAGNOSTICS_ENV = "SLEEP_HEALTH_DIAGNOSTICS"
+
+_current = contextvars.ContextVar("sleep_health_trace", default=None)
+_history = defaultdict(lambda: deque(maxlen=WINDOW))
+_history_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+# -------------------- SPANS --------------------
+class Trace:
+    """Timing spans of one rerun of one page."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.total_ms = None
+        self.spans = []
+        self.payload = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, ms: float):
+        with self._lock:
+            self.spans.append({"name": name, "ms": round(ms, 3), "thread": threading.current_thread().name})
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the current rerun's trace (a no-op outside a traced rerun)."""
+    trace = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add(name, (time.perf_counter() - started) * 1000)
+
+
+def traced(name=None):
+    """Decorator form of span(); the stage name defaults to the function name."""
+    def decorate(func):
+        stage = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def submit(pool, func, *args, **kwargs):
+    """pool.submit that carries the current trace into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+# -------------------- RERUNS --------------------
+def begin(page: str) -> Trace:
+    trace = Trace(page)
+    trace.payload = payload.watch()
+    _current.set(trace)
+    return trace
+
+
+@contextmanager
+def fragment_run(name: str):
+    """Trace the body of an st.fragment.
+
+    During a full rerun its spans join the page's trace; when only the
+    fragment reruns, it gets a trace of its own under ``name``.
+    """
+    if _current.get() is not None:
+        yield
+        return
+    begin(name)
+    try:
+        yield
+    finally:
+        finish()
+
+
+def finish():
+    """Close the current rerun's trace: update the per-stage history and append it to the log."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    _current.set(None)
+    trace.total_ms = round((time.perf_counter() - trace.started) * 1000, 3)
+    with _history_lock:
+        _history[(trace.page, "rerun")].append(trace.total_ms)
+        for item in trace.spans:
+            _history[(trace.page, item["name"])].append(item["ms"])
+    if trace.payload is not None:
+        payload.stop(trace.page, trace.payload)
+    if TRACE_LOG:
+        record = {"ts": trace.started_at, "page": trace.page, "rerun": trace.id, "total_ms": trace.total_ms, "spans": trace.spans}
+        if trace.payload is not None:
+            record["payload"] = trace.payload.summary()
+        _append_log(record)
+    return trace
+
+
+def _append_log(record: dict):
+    path = Path(TRACE_LOG)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+def stage_stats(page: str) -> list:
+    """runs / p50 / p95 / last duration (ms) per stage of a page, slowest p95 first."""
+    with _history_lock:
+        series = {stage: list(values) for (owner, stage), values in _history.items() if owner == page}
+    rows = []
+    for stage, values in series.items():
+        p50, p95 = np.percentile(values, [50, 95])
+        rows.append({"stage": stage, "runs": len(values), "p50 ms": round(p50, 1), "p95 ms": round(p95, 1), "last ms": round(values[-1], 1)})
+    return sorted(rows, key=lambda row: row["p95 ms"], reverse=True)
+
+
+# -------------------- PANEL --------------------
+def diagnostics_enabled() -> bool:
+    import streamlit as st
+
+    return os.environ.get(DIAGNOSTICS_ENV) == "1" or st.query_params.get("diagnostics") == "1"
+
+
+def finish_with_panel():
+    """finish() the rerun and, when diagnostics are enabled, show its timings and payload in the sidebar."""
+    trace = finish()
+    if trace is None or not diagnostics_enabled():
+        return trace
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Diagnostics", expanded=True):
+        st.caption(f"This rerun: {trace.total_ms:.0f} ms · {len(trace.spans)} spans")
+        st.dataframe(stage_stats(trace.page), hide_index=True, use_container_width=True)
+        if trace.payload is not None:
+            _payload_panel(st, trace)
+        _cache_panel(st)
+        _animation_panel(st)
+        _import_panel(st, trace.page)
+        _warmup_panel(st)
+        if TRACE_LOG:
+            st.caption(f"Spans are appended to `{TRACE_LOG}`")
+    return trace
+
+
+def _cache_panel(st):
+    rows = [
+        {"cache": s["name"], "entries": s["entries"], "MB": round(s["bytes"] / (1 << 20), 2), "hit rate": f"{s['hit_rate']:.0%}", "hits": s["hits"], "misses": s["misses"], "evictions": s["evictions"]}
+        for s in cache_stats()
+    ]
+    if rows:
+        st.caption("Shared caches (this process)")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def _animation_panel(st):
+    rows = [
+        {
+            "animation": r["file"],
+            "original KB": round(r["original_bytes"] / 1024, 1),
+            "minified KB": round(r["minified_bytes"] / 1024, 1),
+            "layers removed": r.get("layers_removed"),
+            "build ms": round(r["build_ms"], 1) if "build_ms" in r else None,
+            "parse ms": round(r["parse_ms"], 1),
+        }
+        for r in animations.size_report()
+    ]
+    if rows:
+        st.caption("Lottie animations (this process)")
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def _import_panel(st, page: str):
+    rows = startup.load_report(page)
+    if not rows:
+        return
+    st.caption("Heavy imports (this process)")
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    if st.button("Measure cold import cost", key="diagnostics_import_costs"):
+        st.dataframe(startup.import_costs(startup.PAGE_MODULES[page]), hide_index=True, use_container_width=True)
+
+
+def _warmup_panel(st):
+    # Only present when this process was started through sleep_health.warmup.
+    warmup = sys.modules.get("sleep_health.warmup")
+    if warmup is None:
+        return
+    report = warmup.status()
+    if report["state"] == "cold":
+        return
+    st.caption(f"Boot warm-up: {report['state']}, {report['ms']:.0f} ms")
+    st.dataframe(report["stages"], hide_index=True, use_container_width=True)
+
+
+def _payload_panel(st, trace):
+    meter = trace.payload
+    st.caption(
+        f"Payload this rerun: {meter.total / 1024:.1f} KB in {len(meter.elements)} messages "
+        f"(budget {payload.RERUN_BUDGET >> 10} KB)"
+    )
+    if meter.total > payload.RERUN_BUDGET:
+        st.warning("This rerun sent more than the payload budget.")
+    for item in meter.over_budget():
+        st.warning(f"{item['label']}: {item['bytes'] / 1024:.1f} KB (budget {payload.ELEMENT_BUDGET >> 10} KB)")
+    st.dataframe(payload.breakdown(trace.page), hide_index=True, use_container_width=True)
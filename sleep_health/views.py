@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+
+# -------------------- SORT ORDER --------------------
+def sort_order(base: pd.DataFrame, column: str, ascending: bool = True) -> np.ndarray:
+    """Row ids of the whole frame ordered by ``column`` (stable, missing values last)."""
+    ranked = base[column].reset_index(drop=True).sort_values(ascending=ascending, kind="stable", na_position="last")
+    order = ranked.index.to_numpy()
+    order = order.astype(np.int32) if len(order) < 2 ** 31 else order
+    order.flags.writeable = False
+    return order
+
+
+# -------------------- FILTERED VIEW --------------------
+class FrameView:
+    """Row ids over the shared base frame.
+
+    Filtering only produces new row-id arrays; columns are gathered one at a
+    time when a computation needs them, and a full DataFrame is built only by
+    materialize(), right before it is displayed.
+    """
+
+    __slots__ = ("base", "rows")
+
+    def __init__(self, base: pd.DataFrame, rows=None):
+        self.base = base
+        self.rows = np.arange(len(base)) if rows is None else np.asarray(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.rows) == 0
+
+    @property
+    def dense(self) -> bool:
+        """True when the view covers enough of the base that one pass over it beats sorting the rows."""
+        return len(self.rows) * 64 >= len(self.base)
+
+    # -------------------- COLUMN ACCESS --------------------
+    def column(self, name: str) -> pd.Series:
+        """Values of one column for the selected rows (index = base row ids)."""
+        return self.base[name].take(self.rows)
+
+    # -------------------- ORDERING --------------------
+    def sort(self, column: str, ascending: bool = True, order=None) -> "FrameView":
+        """Sub-view ordered by one column, missing values last.
+
+        ``order`` is an optional precomputed sort_order() of the whole base
+        frame; with it, a large selection is ordered in one linear pass
+        instead of being sorted again.
+        """
+        if order is not None and self.dense:
+            keep = np.zeros(len(self.base), dtype=bool)
+            keep[self.rows] = True
+            return FrameView(self.base, order[keep[order]])
+        values = self.base[column].take(np.sort(self.rows))
+        ranked = values.sort_values(ascending=ascending, kind="stable", na_position="last")
+        return FrameView(self.base, ranked.index.to_numpy())
+
+    def page(self, number: int, size: int) -> "FrameView":
+        """Rows ``number * size`` up to the next page (0-based)."""
+        return FrameView(self.base, self.rows[number * size:(number + 1) * size])
+
+    # -------------------- DISPLAY --------------------
+    def materialize(self, columns=None) -> pd.DataFrame:
+        data = self.base if columns is None else self.base[list(columns)]
+        return data.take(self.rows).reset_index(drop=True)
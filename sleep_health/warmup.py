@@ -0,0 +1,234 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sleep_health import startup
+from sleep_health.animations import ANIMATIONS, load_lottie
+from sleep_health.assets import IMAGES, audio_url, image_urls
+from sleep_health.charts import cached_pie_chart, cached_ridgeline, figure_key
+from sleep_health.filters import FilterSpec
+from sleep_health.insights import DISORDER_ORDER
+from sleep_health.plots import cached_figure, heart_rate_line, plot_key, sleep_quality_bar
+from sleep_health.snapshot import build_snapshot, dataset_version
+from sleep_health.store import load_age_prefix, load_cube, load_data, load_index, select_rows
+from sleep_health.views import FrameView
+
+# -------------------- SETTINGS --------------------
+# python -m sleep_health.warmup run "Welcome_to_our_project ⭐💫.py" [streamlit args]
+#
+# Warm-up fills this process's caches with everything the first visitor would
+# otherwise pay for, and /_stcore/health answers 503 until it is done, so a
+# load balancer polling it holds traffic until the worker is warm.
+THREADS = int(os.environ.get("SLEEP_HEALTH_WARMUP_THREADS", "4"))
+# Seconds after which the worker reports ready anyway; pages still work cold.
+TIMEOUT = float(os.environ.get("SLEEP_HEALTH_WARMUP_TIMEOUT", "120"))
+AUDIO = ("lofi.mp3",)
+
+_lock = threading.Lock()
+_stages = {}
+_done = threading.Event()
+_thread = None
+_started = _finished = None
+_gated = False
+
+
+# -------------------- STAGES --------------------
+def _dataset() -> FilterSpec:
+    """Snapshot, frame, bitmap index, cube and age prefix sums; returns the default filter state."""
+    build_snapshot()
+    frame = load_data()
+    load_index()
+    load_cube()
+    load_age_prefix()
+    spec = default_spec(frame)
+    select_rows(spec)
+    select_rows(_wellness_spec(spec))
+    return spec
+
+
+def _images():
+    for name in IMAGES:
+        image_urls(name)
+    for name in AUDIO:
+        audio_url(name)
+
+
+def _animations():
+    for name in ANIMATIONS:
+        load_lottie(name)
+
+
+def _imports():
+    for name in sorted({name for names in startup.PAGE_MODULES.values() for name in names}):
+        startup.load(name)
+
+
+def default_spec(frame) -> FilterSpec:
+    """The filter state every page opens with: no selections, the full age range."""
+    return FilterSpec.build(value_range=(int(frame['Age'].min()), int(frame['Age'].max())))
+
+
+# -------------------- DEFAULT VIEWS --------------------
+# Each mirrors what its page computes for the default filter state, with the
+# same cache keys, so the first rerun of the page finds its figures cached.
+def _risk_pie(spec):
+    stats = load_cube().rollup(['Sleep Disorder'], **spec.query()).set_index('Sleep Disorder')
+    counts = stats['count'].reindex(DISORDER_ORDER).fillna(0)
+    counts = counts[counts > 0]
+    if not counts.empty:
+        cached_pie_chart(figure_key(spec, dataset_version()), counts)
+
+
+def _risk_ridgeline(spec):
+    cached_ridgeline(figure_key(spec, dataset_version()), FrameView(load_data(), select_rows(spec)))
+
+
+def _wellness_spec(spec) -> FilterSpec:
+    # The Work & Wellness page always keeps only complete rows.
+    return FilterSpec.build(value_range=spec.value_range, flags=('complete',))
+
+
+def _wellness_line(spec):
+    spec = _wellness_spec(spec)
+    cached_figure(plot_key("heart_rate_line", spec, None, dataset_version()), lambda: heart_rate_line(load_cube(), spec))
+
+
+def _wellness_bar(spec):
+    spec = _wellness_spec(spec)
+    cached_figure(plot_key("sleep_quality_bar", spec, 'All', dataset_version()), lambda: sleep_quality_bar(load_cube(), 'All', spec))
+
+
+ASSET_STAGES = (("images", _images), ("animations", _animations), ("imports", _imports))
+VIEW_STAGES = (
+    ("risk pie chart", _risk_pie),
+    ("risk ridgeline", _risk_ridgeline),
+    ("wellness line chart", _wellness_line),
+    ("wellness bar chart", _wellness_bar),
+)
+
+
+# -------------------- RUN --------------------
+def _stage(name: str, func, *args):
+    started = time.perf_counter()
+    error = None
+    try:
+        return func(*args)
+    except Exception as exc:
+        error = repr(exc)
+        raise
+    finally:
+        with _lock:
+            _stages[name] = {
+                "ms": (time.perf_counter() - started) * 1000,
+                "by": threading.current_thread().name,
+                "error": error,
+            }
+
+
+def _run():
+    global _finished
+    pool = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix="warmup")
+    try:
+        dataset = pool.submit(_stage, "dataset", _dataset)
+        pending = [pool.submit(_stage, name, func) for name, func in ASSET_STAGES]
+        try:
+            spec = dataset.result(timeout=TIMEOUT)
+        except Exception:
+            spec = None
+        if spec is not None:
+            pending += [pool.submit(_stage, name, func, spec) for name, func in VIEW_STAGES]
+        remaining = TIMEOUT - (time.perf_counter() - _started)
+        wait(pending, timeout=max(remaining, 0))
+    finally:
+        pool.shutdown(wait=False)
+        _finished = time.perf_counter()
+        _done.set()
+        print(f"Warm-up finished in {(_finished - _started) * 1000:.0f} ms", flush=True)
+
+
+def start() -> threading.Thread:
+    """Warm the caches in a background thread; the thread pool runs independent stages in parallel."""
+    global _thread, _started
+    with _lock:
+        if _thread is not None:
+            return _thread
+        _started = time.perf_counter()
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def ready() -> bool:
+    return _done.is_set()
+
+
+def status() -> dict:
+    """State of this process's warm-up and the duration of each stage."""
+    if _thread is None:
+        state = "cold"
+    else:
+        state = "ready" if _done.is_set() else "warming"
+    with _lock:
+        stages = [{"stage": name, "ms": round(entry["ms"], 1), "thread": entry["by"], "error": entry["error"]} for name, entry in _stages.items()]
+    end = _finished if _finished is not None else time.perf_counter()
+    return {"state": state, "ms": None if _started is None else round((end - _started) * 1000, 1), "stages": stages}
+
+
+# -------------------- READINESS --------------------
+def gate_health():
+    """Make Streamlit's /_stcore/health answer 503 "warming up" until warm-up finishes.
+
+    The browser client also polls this endpoint before connecting, so visitors
+    wait on the connecting screen rather than on a cold page.
+    """
+    global _gated
+    from streamlit.runtime.runtime import Runtime
+
+    with _lock:
+        if _gated:
+            return
+        _gated = True
+    runtime_ready = Runtime.is_ready_for_browser_connection
+
+    async def is_ready(runtime):
+        if not _done.is_set():
+            return False, "warming up"
+        return await runtime_ready.fget(runtime)
+
+    Runtime.is_ready_for_browser_connection = property(is_ready)
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Warm the caches at server start and hold health checks until they are warm.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="run the warm-up in this process and print each stage's duration")
+    run = sub.add_parser("run", help="gate /_stcore/health, start the warm-up, then `streamlit run` the given arguments")
+    run.add_argument("streamlit_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        start().join()
+        report = status()
+        for stage in report["stages"]:
+            flag = f"  FAILED {stage['error']}" if stage["error"] else ""
+            print(f"  {stage['ms']:>8.1f} ms  {stage['thread']:<10}  {stage['stage']}{flag}")
+        print(f"  {report['ms']:>8.1f} ms  total")
+        return
+    from streamlit.web import cli
+
+    gate_health()
+    start()
+    sys.argv = ["streamlit", "run", *args.streamlit_args]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    # `python -m` runs this file as __main__, a second copy of the module;
+    # run the imported one so its state is what the pages see.
+    from sleep_health import warmup
+
+    warmup.main()